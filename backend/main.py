@@ -1,19 +1,27 @@
+import asyncio
 from os import getenv
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from models.clubs.clubs_sync import sync_clubs
+from models.notifications.notifications_config import run_outbox_dispatcher
 # just import whatever routers you want to import from ./routers here.
 from routers import (recommendations_router, interviews_router, users_router, recruitment_router, clubs_router,
-                     applications_router, calendar_router, )
-from utils.database_utils import SessionLocal, init_db
+                     applications_router, calendar_router, metrics_router, )
+from utils.database_utils import SessionLocal, init_db, read_your_writes_middleware
+from utils.query_stats_utils import query_stats_middleware
+from utils.session_utils import STATELESS_SESSIONS, run_revocation_refresher, run_session_reaper
 
 # FastAPI instance here, along with CORS middleware
 DEBUG = getenv("DEBUG_BACKEND", "False").lower() in ("true", "t", "1")
 app = FastAPI(debug=DEBUG, title="Recruitment Management System backend", description="Backend for the RMS-IIITH", )
 app.add_middleware(CORSMiddleware, allow_credentials=True, allow_origins=["*"], allow_headers=["*"],
     allow_methods=["GET", "POST"], )
+# count the SQL statements issued by every request, to catch N+1 queries.
+app.middleware("http")(query_stats_middleware)
+# keep users on the primary database for a few seconds after they write (only matters with a read replica).
+app.middleware("http")(read_your_writes_middleware)
 
 
 # tasks to run on server startup.
@@ -29,6 +37,23 @@ async def on_startup():
     finally:
         db.close()
 
+    # periodically delete expired sessions
+    app.state.background_tasks = [asyncio.create_task(run_session_reaper())]
+
+    # send the emails queued in the notification outbox
+    app.state.background_tasks.append(asyncio.create_task(run_outbox_dispatcher()))
+
+    # keep the revocation set for signed session claims up to date
+    if STATELESS_SESSIONS:
+        app.state.background_tasks.append(asyncio.create_task(run_revocation_refresher()))
+
+
+# tasks to run on server shutdown.
+@app.on_event("shutdown")
+async def on_shutdown():
+    for task in getattr(app.state, "background_tasks", []):
+        task.cancel()
+
 
 # base path for checking if the backend is alive.
 @app.get("/", tags=["General"])
@@ -44,3 +69,4 @@ app.include_router(recruitment_router.router, prefix="/api/recruitment")
 app.include_router(calendar_router.router, prefix="/api/calendar")
 app.include_router(recommendations_router.router, prefix="/api")
 app.include_router(interviews_router.router, prefix="/api/interviews")
+app.include_router(metrics_router.router, prefix="/api/internal")
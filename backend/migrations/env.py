@@ -0,0 +1,43 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+# import every model so that Base.metadata knows about all the tables
+import models.applications.applications_model  # noqa: F401
+import models.calendar.calendar_events_model  # noqa: F401
+import models.calendar.interview_models  # noqa: F401
+import models.club_recruitment.club_recruitment_model  # noqa: F401
+import models.clubs.clubs_model  # noqa: F401
+import models.notifications.notifications_model  # noqa: F401
+import models.users.session_model  # noqa: F401
+import models.users.users_model  # noqa: F401
+from utils.database_utils import Base, engine
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    context.configure(url=engine.url.render_as_string(hide_password=False), target_metadata=target_metadata,
+                      literal_binds=True, dialect_opts={"paramstyle": "named"}, )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,64 @@
+"""add indexes for hot lookup columns and a primary key on club_members
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    ("ix_applications_form_id", "applications", "form_id"),
+    ("ix_responses_application_id", "responses", "application_id"),
+    ("ix_questions_form_id", "questions", "form_id"),
+    ("ix_club_members_user_id", "club_members", "user_id"),
+    ("ix_calendar_event_interview_schedule_id", "calendar_event", "interview_schedule_id"),
+    ("ix_calendar_event_visible_to_user", "calendar_event", "visible_to_user"),
+    ("ix_calendar_event_club_id", "calendar_event", "club_id"),
+    ("ix_interview_slot_schedule_date_time", "interview_slot", "interview_schedule_id, date, start_time, end_time"),
+    ("ix_interview_panel_interview_schedule_id", "interview_panel", "interview_schedule_id"),
+    ("ix_interview_schedule_form_id_club_id", "interview_schedule", "form_id, club_id"),
+    ("ix_sessions_id_expires_at", "sessions", "id, expires_at"),
+    ("ix_sessions_user_uid", "sessions", "user_uid"),
+]
+
+
+def upgrade() -> None:
+    # club_members has no primary key on databases created before this migration. drop rows that cannot be part of
+    # one (null ids, duplicates) first.
+    has_primary_key = sa.inspect(op.get_bind()).get_pk_constraint("club_members").get("constrained_columns")
+    if not has_primary_key:
+        op.execute("DELETE FROM club_members WHERE club_id IS NULL OR user_id IS NULL")
+        op.execute("DELETE FROM club_members a USING club_members b "
+                   "WHERE a.ctid < b.ctid AND a.club_id = b.club_id AND a.user_id = b.user_id")
+        op.execute("ALTER TABLE club_members ALTER COLUMN club_id SET NOT NULL, ALTER COLUMN user_id SET NOT NULL")
+
+    # build the indexes without blocking writes
+    with op.get_context().autocommit_block():
+        if not has_primary_key:
+            op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS club_members_pkey "
+                       "ON club_members (club_id, user_id)")
+        for name, table, columns in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})")
+
+    if not has_primary_key:
+        op.execute("ALTER TABLE club_members ADD CONSTRAINT club_members_pkey PRIMARY KEY USING INDEX club_members_pkey")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE club_members DROP CONSTRAINT IF EXISTS club_members_pkey")
+    op.execute("ALTER TABLE club_members ALTER COLUMN club_id DROP NOT NULL, ALTER COLUMN user_id DROP NOT NULL")
+
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
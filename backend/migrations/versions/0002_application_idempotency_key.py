@@ -0,0 +1,24 @@
+"""add an idempotency key to applications
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE applications ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE applications DROP COLUMN IF EXISTS idempotency_key")
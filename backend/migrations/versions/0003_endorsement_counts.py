@@ -0,0 +1,36 @@
+"""add a maintained endorsement count and a gin index on endorser ids
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE applications ALTER COLUMN endorser_ids SET DEFAULT '{}'")
+    op.execute("UPDATE applications SET endorser_ids = '{}' WHERE endorser_ids IS NULL")
+    op.execute("ALTER TABLE applications ADD COLUMN IF NOT EXISTS endorser_count INTEGER NOT NULL DEFAULT 0")
+    op.execute("UPDATE applications SET endorser_count = cardinality(endorser_ids) "
+               "WHERE endorser_count <> cardinality(endorser_ids)")
+
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_applications_endorser_ids "
+                   "ON applications USING gin (endorser_ids)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_applications_endorser_ids")
+
+    op.execute("ALTER TABLE applications DROP COLUMN IF EXISTS endorser_count")
+    op.execute("ALTER TABLE applications ALTER COLUMN endorser_ids DROP DEFAULT")
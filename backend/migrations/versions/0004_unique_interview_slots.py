@@ -0,0 +1,57 @@
+"""make interview slots unique per schedule, date and time
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # merge duplicate slots into the oldest one, moving their calendar events over first
+    op.execute("""
+        WITH duplicates AS (
+            SELECT id, min(id) OVER (PARTITION BY interview_schedule_id, date, start_time, end_time) AS keep_id
+            FROM interview_slot
+        )
+        UPDATE calendar_event SET interview_slot_id = duplicates.keep_id
+        FROM duplicates
+        WHERE calendar_event.interview_slot_id = duplicates.id AND duplicates.id <> duplicates.keep_id
+    """)
+    op.execute("DELETE FROM interview_slot a USING interview_slot b "
+               "WHERE a.id > b.id AND a.interview_schedule_id = b.interview_schedule_id AND a.date = b.date "
+               "AND a.start_time = b.start_time AND a.end_time = b.end_time")
+
+    with op.get_context().autocommit_block():
+        op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_interview_slot_schedule_date_time "
+                   "ON interview_slot (interview_schedule_id, date, start_time, end_time)")
+
+    op.execute("""
+        DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_interview_slot_schedule_date_time') THEN
+                ALTER TABLE interview_slot ADD CONSTRAINT uq_interview_slot_schedule_date_time
+                    UNIQUE USING INDEX uq_interview_slot_schedule_date_time;
+            END IF;
+        END $$
+    """)
+
+    # the unique index covers the same lookups
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_interview_slot_schedule_date_time")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE interview_slot DROP CONSTRAINT IF EXISTS uq_interview_slot_schedule_date_time")
+
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_interview_slot_schedule_date_time "
+                   "ON interview_slot (interview_schedule_id, date, start_time, end_time)")
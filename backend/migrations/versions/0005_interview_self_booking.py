@@ -0,0 +1,33 @@
+"""add a published flag to interview schedules and a booked count to interview slots
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE interview_schedule ADD COLUMN IF NOT EXISTS published_at TIMESTAMP WITHOUT TIME ZONE")
+    op.execute("ALTER TABLE interview_slot ADD COLUMN IF NOT EXISTS booked_count INTEGER NOT NULL DEFAULT 0")
+
+    # count the interviews already allocated to every slot
+    op.execute("""
+        UPDATE interview_slot SET booked_count = counts.booked_count
+        FROM (SELECT interview_slot_id, count(*) AS booked_count FROM calendar_event GROUP BY interview_slot_id) counts
+        WHERE interview_slot.id = counts.interview_slot_id AND interview_slot.booked_count <> counts.booked_count
+    """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE interview_slot DROP COLUMN IF EXISTS booked_count")
+    op.execute("ALTER TABLE interview_schedule DROP COLUMN IF EXISTS published_at")
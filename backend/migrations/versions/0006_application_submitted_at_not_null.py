@@ -0,0 +1,40 @@
+"""make applications.submitted_at not null, so it can be a pagination key
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # submitted_at is naive utc. applications without one count as submitted now.
+    op.execute("ALTER TABLE applications ALTER COLUMN submitted_at SET DEFAULT (now() AT TIME ZONE 'utc')")
+    op.execute("UPDATE applications SET submitted_at = now() AT TIME ZONE 'utc' WHERE submitted_at IS NULL")
+
+    # a validated check constraint lets SET NOT NULL skip its own scan of the table under an exclusive lock
+    op.execute("""
+        DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'ck_applications_submitted_at_not_null') THEN
+                ALTER TABLE applications ADD CONSTRAINT ck_applications_submitted_at_not_null
+                    CHECK (submitted_at IS NOT NULL) NOT VALID;
+            END IF;
+        END $$
+    """)
+    op.execute("ALTER TABLE applications VALIDATE CONSTRAINT ck_applications_submitted_at_not_null")
+    op.execute("ALTER TABLE applications ALTER COLUMN submitted_at SET NOT NULL")
+    op.execute("ALTER TABLE applications DROP CONSTRAINT ck_applications_submitted_at_not_null")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE applications ALTER COLUMN submitted_at DROP NOT NULL")
+    op.execute("ALTER TABLE applications ALTER COLUMN submitted_at DROP DEFAULT")
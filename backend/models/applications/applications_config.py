@@ -1,22 +1,28 @@
+import base64
 import datetime
+import json
 from typing import Dict, Any, List
 
 from fastapi import HTTPException, Depends
-from sqlalchemy import inspect, and_
+from sqlalchemy import inspect, and_, delete, func, insert, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-# Update endorser_ids using a direct SQL update instead of ORM
 from sqlalchemy import update
 from sqlalchemy.orm.exc import StaleDataError
 
 from models.applications.applications_model import Application, ApplicationStatus
 from models.applications.applications_model import Response
 from models.club_recruitment.club_recruitment_model import Form, Question
-from models.clubs.clubs_model import Club
-from models.users.users_config import is_member_of_club, is_admin_of_club
+from models.calendar.interviews_config import release_interviews
+from models.clubs.clubs_model import Club, club_members
+from models.notifications.notifications_config import schedule_status_notifications
+from models.users.users_config import AuthzContext
 from models.users.users_model import User
-from schemas.applications.applications import (ApplicationStatusUpdate, ApplicationDetailOut, ResponseOut, )
-from utils.database_utils import get_db
+from schemas.applications.applications import (ApplicationStatusUpdate, ApplicationDetailOut, ResponseOut,
+                                               FormApplicationOut, BulkStatusUpdate, BulkStatusOutcome, )
+from utils.database_utils import get_async_db, get_db
 from utils.session_utils import get_current_user
 
 
@@ -31,8 +37,8 @@ async def get_application_autofill_info(user_data=Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Failed to retrieve user information: {str(e)}")
 
 
-async def process_submitted_application(form_data: dict, db: Session = Depends(get_db),
-        user_data=Depends(get_current_user)):
+async def process_submitted_application(form_data: dict, db: AsyncSession = Depends(get_async_db),
+        user_data=Depends(get_current_user), idempotency_key: str | None = None):
     try:
         user_id = user_data["uid"]
 
@@ -40,109 +46,105 @@ async def process_submitted_application(form_data: dict, db: Session = Depends(g
         if not form_id:
             raise HTTPException(status_code=400, detail="Form ID is required")
 
-        # check if user has already applied to this form (if yes, do not proceed with this application)
-        existing_application = (
-            db.query(Application).filter(Application.form_id == form_id, Application.user_id == user_id).first())
-
-        if existing_application:
+        # create the application, unless the user already applied to this form (uq_user_id_form_id).
+        # asyncpg only accepts naive datetimes for the naive submitted_at column.
+        submitted_at = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        application_id = (await db.execute(
+            pg_insert(Application).values(form_id=form_id, user_id=user_id, status=ApplicationStatus.ongoing,
+                submitted_at=submitted_at, endorser_ids=[], idempotency_key=idempotency_key).on_conflict_do_nothing(
+                constraint="uq_user_id_form_id").returning(Application.id))).scalar()
+
+        if application_id is None:
+            # a retry of a submission that already went through gets the same answer again
+            existing_application = (await db.execute(
+                select(Application.id, Application.status, Application.idempotency_key).where(
+                    Application.form_id == form_id, Application.user_id == user_id))).first()
+            if idempotency_key and existing_application and existing_application.idempotency_key == idempotency_key:
+                await db.rollback()
+                return {"id": existing_application.id, "status": existing_application.status,
+                    "message": "Application submitted successfully", }
             raise HTTPException(status_code=400, detail="You have already applied for this form")
 
-        # create new application
-        new_application = Application(form_id=form_id, user_id=user_id, status=ApplicationStatus.ongoing)
-
-        db.add(new_application)
-        db.commit()
-        db.refresh(new_application)
-
-        # process responses to questions
+        # insert all responses to questions in one statement, in the same transaction as the application
         responses_data = form_data.get("responses", [])
-        for response_item in responses_data:
-            from models.applications.applications_model import Response
-
-            response = Response(application_id=new_application.id, question_id=response_item["question_id"],
-                answer_text=response_item["answer_text"], )
-            db.add(response)
+        if responses_data:
+            await db.execute(insert(Response).values([{"application_id": application_id,
+                "question_id": response_item["question_id"], "answer_text": response_item["answer_text"], }
+                for response_item in responses_data]))
 
-        db.commit()
+        await db.commit()
 
-        return {"id": new_application.id, "status": new_application.status,
+        return {"id": application_id, "status": ApplicationStatus.ongoing,
             "message": "Application submitted successfully", }
 
     except HTTPException as e:
-        db.rollback()
+        await db.rollback()
         raise e
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to process application: {str(e)}")
 
 
-# check if user has access to application (must've either submitted the application, or belong to the club)
-async def _check_application_access(application_id: int, db: Session, user_data=Depends(get_current_user)) -> Dict[
-    str, Any]:
+# check if user has access to application (must've either submitted the application, or belong to the club).
+# the application is loaded with its form and applicant in one query. with_membership also works out club
+# membership for the applicant themselves (it is always needed, and computed, for everyone else).
+async def _check_application_access(application_id: int, db: Session, user_data=Depends(get_current_user),
+        with_membership: bool = False, authz: AuthzContext | None = None) -> Dict[str, Any]:
     user_id = user_data["uid"]
+    authz = authz or AuthzContext(user_id)
 
-    # fetch application
-    application = db.query(Application).filter(Application.id == application_id).first()
+    # fetch application, along with its form and the applicant's email
+    row = (db.query(Application, Form, User.email)
+           .outerjoin(Form, Form.id == Application.form_id)
+           .outerjoin(User, User.uid == Application.user_id)
+           .filter(Application.id == application_id).first())
 
-    if not application:
+    if not row:
         raise HTTPException(status_code=404, detail="Application not found")
 
-    # check if the current user is the owner of the application or a member of the club the application is submitted to
-    if application.user_id != user_id:
-        form = db.query(Form).filter(Form.id == application.form_id).first()
+    application, form, user_email = row
 
+    # check if the current user is the owner of the application or a member of the club the application is submitted to
+    is_club_member = None
+    if application.user_id != user_id or with_membership:
         if not form:
             raise HTTPException(status_code=404,
                 detail="Ran into an issue while fetching the form associated with this application", )
 
         # check if the user is a member of the club
-        club_membership = is_member_of_club(user_id, form.club_id, db) or is_admin_of_club(user_id, form.club_id, db)
+        is_club_member = authz.role(form.club_id, db).is_member_or_admin
 
-        if not club_membership:
+        if not is_club_member and application.user_id != user_id:
             raise HTTPException(status_code=403, detail="You don't have permission to view this application", )
 
-    return {"application": application, "user_id": user_id}
+    return {"application": application, "user_id": user_id, "form": form, "user_email": user_email,
+            "is_club_member": is_club_member}
 
 
 # get all details about the application
 async def get_application_details(application_id: int, db: Session = Depends(get_db),
-        user_data=Depends(get_current_user), ):
+        user_data=Depends(get_current_user), authz: AuthzContext | None = None):
     try:
-        result = await _check_application_access(application_id, db, user_data)
+        # takes a fixed number of queries: the access check, plus one for the responses
+        result = await _check_application_access(application_id, db, user_data, with_membership=True, authz=authz)
         application = result["application"]
+        form = result["form"]
 
-        form = db.query(Form).filter(Form.id == application.form_id).first()
-        if not form:
-            raise HTTPException(status_code=404, detail="Form associated with this application not found", )
-
-        user = db.query(User).filter(User.uid == application.user_id).first()
-        user_email = user.email if user else None
-
-        responses_data = []
-        responses = (db.query(Response).filter(Response.application_id == application.id).all())
-
-        for response in responses:
-            question = (db.query(Question).filter(Question.id == response.question_id).first())
-
-            response_out = ResponseOut(id=response.id, question_id=response.question_id,
-                answer_text=response.answer_text, question_text=question.question_text if question else None,
-                question_order=question.question_order if question else None, )
-            responses_data.append(response_out)
+        # responses with their questions, in question order
+        rows = (db.query(Response, Question.question_text, Question.question_order)
+                .outerjoin(Question, Question.id == Response.question_id)
+                .filter(Response.application_id == application.id)
+                .order_by(Question.question_order.asc().nulls_last(), Response.id).all())
 
-        responses_data.sort(key=lambda x: (x.question_order or float("inf")))
-
-        current_user_id = result["user_id"]
-
-        if form.club_id:
-            is_club_member = is_member_of_club(current_user_id, form.club_id, db) or is_admin_of_club(current_user_id,
-                                                                                                      form.club_id, db)
+        responses_data = [ResponseOut(id=response.id, question_id=response.question_id,
+            answer_text=response.answer_text, question_text=question_text, question_order=question_order, )
+            for response, question_text, question_order in rows]
 
         application_details = ApplicationDetailOut(id=application.id, form_id=application.form_id,
             user_id=application.user_id, form_name=form.name, club_id=form.club_id,
             submitted_at=application.submitted_at, status=application.status, responses=responses_data,
             endorser_ids=application.endorser_ids if application.endorser_ids else [],
-            endorser_count=len(application.endorser_ids) if application.endorser_ids else 0, user_email=user_email,
-            is_club_member=is_club_member, )
+            endorser_count=application.endorser_count, user_email=result["user_email"], is_club_member=result["is_club_member"], )
 
         return application_details
 
@@ -160,7 +162,7 @@ async def get_application_status(application_id: int, db: Session = Depends(get_
 
         # return application status
         return {"id": application.id, "status": application.status.value, "submitted_at": application.submitted_at,
-            "endorser_count": len(application.endorser_ids) if application.endorser_ids else 0, }
+            "endorser_count": application.endorser_count, }
 
     except HTTPException as e:
         raise e
@@ -169,7 +171,7 @@ async def get_application_status(application_id: int, db: Session = Depends(get_
 
 
 async def update_application_status(db: Session, application_id: int, status_update: ApplicationStatusUpdate,
-        user_data=Depends(get_current_user)):
+        user_data=Depends(get_current_user), authz: AuthzContext | None = None):
     application = db.query(Application).filter(Application.id == application_id).first()
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
@@ -182,12 +184,31 @@ async def update_application_status(db: Session, application_id: int, status_upd
     club_cid = form.club_id
 
     # only club admins should be able to update application status
-    club_admin = is_admin_of_club(user_data.get("uid"), club_cid, db)
+    authz = authz or AuthzContext(user_data.get("uid"))
+    club_admin = authz.role(club_cid, db).is_admin
 
     if not club_admin:
         raise HTTPException(status_code=403, detail="Only club admins can update application status")
 
-    # if we are before the deadline, do not allow status update
+    _check_deadline_passed(form)
+
+    previous_status = application.status
+    application.status = status_update.status  # type: ignore
+    if application.status != previous_status:
+        schedule_status_notifications(db, form_id, [(application.user_id, previous_status, application.status)])
+
+    if application.status == ApplicationStatus.accepted:
+        _sync_club_members(db, club_cid, accepted_user_ids=[application.user_id])
+    elif application.status == ApplicationStatus.rejected:
+        _sync_club_members(db, club_cid, rejected_user_ids=[application.user_id])
+
+    db.commit()
+    db.refresh(application)
+    return application, form
+
+
+# if we are before the deadline, do not allow status updates
+def _check_deadline_passed(form: Form) -> None:
     if form.deadline:
         # convert form.deadline to offset-aware if it's offset-naive
         deadline = form.deadline
@@ -200,27 +221,78 @@ async def update_application_status(db: Session, application_id: int, status_upd
         if deadline > now:
             raise HTTPException(status_code=400, detail="Cannot update application status before the deadline", )
 
-    application.status = status_update.status  # type: ignore
 
-    club = db.query(Club).filter(Club.cid == form.club_id).first()
-    if not club:
-        raise HTTPException(status_code=404, detail="Club not found")
+# accepted applicants become club members, rejected ones stop being members. one statement for each list.
+def _sync_club_members(db: Session, club_cid: str, accepted_user_ids: List[str] = (),
+        rejected_user_ids: List[str] = ()) -> None:
+    if accepted_user_ids:
+        db.execute(pg_insert(club_members).values(
+            [{"club_id": club_cid, "user_id": user_id} for user_id in set(accepted_user_ids)]).on_conflict_do_nothing(
+            index_elements=["club_id", "user_id"]))
+    if rejected_user_ids:
+        db.execute(delete(club_members).where(club_members.c.club_id == club_cid,
+            club_members.c.user_id.in_(set(rejected_user_ids))))
+
+
+async def bulk_update_application_status(db: Session, form_id: int, bulk_update: BulkStatusUpdate,
+        user_data=Depends(get_current_user), authz: AuthzContext | None = None) -> List[BulkStatusOutcome]:
+    """
+    Apply many status changes to the applications of one form in a single transaction: one UPDATE per target status
+    (plus one for reject_remaining) and one club_members statement per direction. The applicants are notified
+    through the status digest. Returns the per-application outcomes.
+    """
+    form = db.query(Form).filter(Form.id == form_id).first()
+    if not form:
+        raise HTTPException(status_code=404, detail="Form not found")
 
-    user = db.query(User).filter(User.uid == application.user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    club_cid = form.club_id
 
-    if application.status == ApplicationStatus.accepted:
-        if user not in club.members:
-            club.members.append(user)
+    # only club admins should be able to update application status
+    authz = authz or AuthzContext(user_data.get("uid"))
+    if not authz.role(club_cid, db).is_admin:
+        raise HTTPException(status_code=403, detail="Only club admins can update application status")
 
-    elif application.status == ApplicationStatus.rejected:
-        if user in club.members:
-            club.members.remove(user)
+    _check_deadline_passed(form)
+
+    # the last entry wins if an application is listed more than once
+    requested = {update_item.application_id: update_item.status for update_item in bulk_update.updates}
+    current = {app_id: app_status for app_id, app_status in db.query(Application.id, Application.status).filter(
+        Application.form_id == form_id, Application.id.in_(requested)).all()} if requested else {}
+
+    outcomes = {}
+    targets: Dict[ApplicationStatus, List[int]] = {}
+    for app_id, target_status in requested.items():
+        if app_id not in current:
+            outcomes[app_id] = BulkStatusOutcome(application_id=app_id, outcome="not_found",
+                detail="Application not found for this form")
+        elif current[app_id] == target_status:
+            outcomes[app_id] = BulkStatusOutcome(application_id=app_id, outcome="unchanged", status=target_status)
+        else:
+            targets.setdefault(target_status, []).append(app_id)
+
+    changed = []
+    for target_status, app_ids in targets.items():
+        changed += [(row.id, row.user_id, current[row.id], target_status) for row in db.execute(
+            update(Application).where(Application.form_id == form_id, Application.id.in_(app_ids))
+            .values(status=target_status).returning(Application.id, Application.user_id))]
+
+    if bulk_update.reject_remaining:
+        changed += [(row.id, row.user_id, ApplicationStatus.ongoing, ApplicationStatus.rejected) for row in db.execute(
+            update(Application).where(Application.form_id == form_id, Application.status == ApplicationStatus.ongoing,
+                Application.id.not_in(requested)).values(status=ApplicationStatus.rejected)
+            .returning(Application.id, Application.user_id))]
+
+    _sync_club_members(db, club_cid,
+        accepted_user_ids=[user_id for _, user_id, _, new_status in changed if new_status == ApplicationStatus.accepted],
+        rejected_user_ids=[user_id for _, user_id, _, new_status in changed if new_status == ApplicationStatus.rejected])
+    schedule_status_notifications(db, form_id, [change[1:] for change in changed])
 
     db.commit()
-    db.refresh(application)
-    return application, form
+
+    for app_id, _, _, new_status in changed:
+        outcomes[app_id] = BulkStatusOutcome(application_id=app_id, outcome="updated", status=new_status)
+
+    return list(outcomes.values())
 
 
 # if the current user is a member of this club, they can endorse the application.
@@ -228,62 +300,60 @@ async def endorse_application(
         application_id: int,
         db: Session = Depends(get_db),
         user_data=Depends(get_current_user),
+        authz: AuthzContext | None = None,
 ):
     try:
         user_id = user_data["uid"]
-
-        # fetch application
-        application = (
-            db.query(Application).filter(Application.id == application_id).first()
+        authz = authz or AuthzContext(user_id)
+
+        # fetch the club the application was submitted to
+        row = (
+            db.query(Application.id, Form.club_id)
+            .outerjoin(Form, Form.id == Application.form_id)
+            .filter(Application.id == application_id)
+            .first()
         )
 
-        if not application:
+        if not row:
             raise HTTPException(status_code=404, detail="Application not found")
 
-        form = db.query(Form).filter(Form.id == application.form_id).first()
+        club_cid = row.club_id
 
-        if not form:
+        if not club_cid:
             raise HTTPException(
                 status_code=404,
                 detail="Form associated with this application not found",
             )
 
-        club_cid = form.club_id
-
         # check if user is a member of the club
-        club_membership = is_member_of_club(user_id, club_cid, db) or is_admin_of_club(user_id, club_cid, db)
+        club_membership = authz.role(club_cid, db).is_member_or_admin
 
         if not club_membership:
             raise HTTPException(
                 status_code=403, detail="Only club members and admins can endorse applications"
             )
 
+        # append the user in a single guarded update, so concurrent endorsements cannot overwrite each other
+        updated_application = db.execute(
+            update(Application)
+            .where(Application.id == application_id, ~Application.endorser_ids.contains([user_id]))
+            .values(endorser_ids=func.array_append(Application.endorser_ids, user_id),
+                    endorser_count=Application.endorser_count + 1)
+            .returning(Application.id, Application.status, Application.endorser_count)
+        ).first()
+
         # check if user has already endorsed this application
-        if application.endorser_ids and user_id in application.endorser_ids:
+        if not updated_application:
             raise HTTPException(
                 status_code=400, detail="You have already endorsed this application"
             )
 
-        # get the current endorser_ids or initialize as empty list
-        current_endorsers = application.endorser_ids if application.endorser_ids else []
-
-        # create new list with the user_id added
-        new_endorsers = list(current_endorsers) + [user_id]
-
-        # directly update the database with SQL
-        stmt = update(Application).where(Application.id == application_id).values(endorser_ids=new_endorsers)
-        db.execute(stmt)
         db.commit()
 
-        # re-query to get updated application
-        updated_application = db.query(Application).filter(Application.id == application_id).first()
-
         return {
             "id": updated_application.id,
             "status": updated_application.status.value,
-            "endorser_count": len(updated_application.endorser_ids)
-            if updated_application.endorser_ids
-            else 0,
+            "endorser_count": updated_application.endorser_count,
             "message": "Application endorsed successfully",
         }
 
@@ -308,18 +378,24 @@ async def withdraw_endorsement(application_id: int, db: Session = Depends(get_db
         if application.status != ApplicationStatus.ongoing:
             raise HTTPException(status_code=400, detail="Can only withdraw endorsements for ongoing applications", )
 
+        # remove the user in a single guarded update (a no-op if they have not endorsed the application)
+        updated_application = db.execute(
+            update(Application)
+            .where(Application.id == application.id, Application.status == ApplicationStatus.ongoing,
+                   Application.endorser_ids.contains([user_id]))
+            .values(endorser_ids=func.array_remove(Application.endorser_ids, user_id),
+                    endorser_count=Application.endorser_count - 1)
+            .returning(Application.id, Application.status, Application.endorser_count)).first()
+
         # check if user has endorsed this application
-        if user_id not in application.endorser_ids:
+        if not updated_application:
+            db.rollback()
             raise HTTPException(status_code=400, detail="You have not endorsed this application")
 
-        # remove user from endorsers
-        application.endorser_ids = [endorser_id for endorser_id in application.endorser_ids if endorser_id != user_id]
-
         db.commit()
-        db.refresh(application)
 
-        return {"id": application.id, "status": application.status.value,
-            "endorser_count": len(application.endorser_ids) if application.endorser_ids else 0,
+        return {"id": updated_application.id, "status": updated_application.status.value,
+            "endorser_count": updated_application.endorser_count,
             "message": "Endorsement withdrawn successfully"}
 
     except HTTPException as e:
@@ -342,6 +418,9 @@ async def delete_application(application_id: int, db: Session = Depends(get_db),
         if application.user_id != user_id:
             raise HTTPException(status_code=403, detail="Only the user who submitted the application can delete it", )
 
+        # free their interview slot, if one was scheduled, for an applicant still waiting for one
+        release_interviews(db, application.form_id, user_id)
+
         db.delete(application)
         db.commit()
 
@@ -355,69 +434,130 @@ async def delete_application(application_id: int, db: Session = Depends(get_db),
         raise HTTPException(status_code=500, detail=f"Failed to delete application: {str(e)}")
 
 
-async def get_form_applications(form_id: int, db: Session, user_data=Depends(get_current_user)) -> List:
+# applications with their applicant and form, as needed for FormApplicationOut
+def _select_form_applications():
+    return (select(Application.id, Application.user_id, User.first_name, User.last_name, User.email,
+                   Application.form_id, Form.name.label("form_name"), Application.status, Application.endorser_ids,
+                   Application.endorser_count, Application.submitted_at)
+            .join(Form, Form.id == Application.form_id)
+            .outerjoin(User, User.uid == Application.user_id))
+
+
+def _form_application_out(row) -> FormApplicationOut:
+    return FormApplicationOut(id=row.id, user_id=row.user_id,
+        user_name=f"{row.first_name} {row.last_name}" if row.email is not None else "Unknown",
+        user_email=row.email or "", form_id=row.form_id, form_name=row.form_name, status=row.status,
+        endorser_ids=row.endorser_ids or [], endorser_count=row.endorser_count, submitted_at=row.submitted_at)
+
+
+# keyset pagination cursors are the sort key of the last row of a page, as urlsafe base64 encoded json.
+def _encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> list:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def get_form_applications(form_id: int, db: AsyncSession, user_data=Depends(get_current_user),
+        status: ApplicationStatus | None = None, sort: str = "submitted_at", cursor: str | None = None,
+        limit: int | None = None, authz: AuthzContext | None = None) -> tuple[List[FormApplicationOut], str | None]:
+    """
+    List the applications for a form, oldest first (or most endorsed first with sort="endorsements").
+    Returns the page and the cursor for the next page (None on the last page, or when no limit is given).
+    """
     user_uid = user_data.get("uid")
     if not user_uid:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
     # get the form to check club membership
-    form = db.query(Form).filter(Form.id == form_id).first()
+    form = await db.get(Form, form_id)
     if not form:
         raise HTTPException(status_code=404, detail=f"Form with ID {form_id} not found")
 
     club_cid = form.club_id
 
     # check if user is a club member or club admin
-    club_membership = is_member_of_club(user_uid, club_cid, db) or is_admin_of_club(user_uid, club_cid, db)
+    authz = authz or AuthzContext(user_uid)
+    club_membership = (await authz.role_async(club_cid, db)).is_member_or_admin
 
     if not club_membership:
         raise HTTPException(status_code=403,
             detail="Only club members and admins can view all applications for a form", )
 
-    # get all applications for this form
-    applications = db.query(Application).filter(Application.form_id == form_id).all()
+    # applications with their user and form, in one query
+    endorser_count = Application.endorser_count
+    query = _select_form_applications().where(Application.form_id == form_id)
+    if status is not None:
+        query = query.where(Application.status == status)
+
+    # keyset pagination: continue right after the last row of the previous page
+    if sort == "endorsements":
+        query = query.order_by(endorser_count.desc(), Application.submitted_at, Application.id)
+        if cursor:
+            last_count, last_submitted_at, last_id = _decode_cursor(cursor)
+            last_submitted_at = datetime.datetime.fromisoformat(last_submitted_at)
+            query = query.where(or_(endorser_count < last_count, and_(endorser_count == last_count,
+                tuple_(Application.submitted_at, Application.id) > (last_submitted_at, last_id))))
+    else:
+        query = query.order_by(Application.submitted_at, Application.id)
+        if cursor:
+            last_submitted_at, last_id = _decode_cursor(cursor)
+            last_submitted_at = datetime.datetime.fromisoformat(last_submitted_at)
+            query = query.where(tuple_(Application.submitted_at, Application.id) > (last_submitted_at, last_id))
 
-    # get user information for each application
-    result = []
-    for app in applications:
-        user = db.query(User).filter(User.uid == app.user_id).first()
-        user_name = f"{user.first_name} {user.last_name}" if user else "Unknown"
+    if limit is not None:
+        # one extra row tells whether there is a next page
+        query = query.limit(limit + 1)
 
-        app_dict = {"id": app.id, "user_id": app.user_id, "user_name": user_name,
-            "user_email": user.email if user else None, "form_id": app.form_id,
-            "form_name": form.name if form else None, "status": app.status.name,
-            "endorser_ids": app.endorser_ids if app.endorser_ids else [],
-            "endorser_count": len(app.endorser_ids) if app.endorser_ids else 0,
-            "submitted_at": app.submitted_at.isoformat(), }
-        result.append(app_dict)
+    rows = (await db.execute(query)).all()
 
-    return result
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        sort_key = [last.submitted_at.isoformat(), last.id]
+        next_cursor = _encode_cursor([last.endorser_count, *sort_key] if sort == "endorsements" else sort_key)
+
+    return [_form_application_out(row) for row in rows], next_cursor
 
 
-async def get_user_applications(db: Session, user_data=Depends(get_current_user)) -> List:
+# applications the current user has endorsed, most recently submitted first (served by the gin index on endorser_ids)
+async def get_endorsed_applications(db: AsyncSession, user_data=Depends(get_current_user),
+        form_id: int | None = None) -> List[FormApplicationOut]:
     user_uid = user_data.get("uid")
     if not user_uid:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
-    # query applications with form and club information
-    applications = db.query(Application).filter(Application.user_id == user_uid).all()
+    query = _select_form_applications().where(Application.endorser_ids.contains([user_uid]))
+    if form_id is not None:
+        query = query.where(Application.form_id == form_id)
+
+    rows = (await db.execute(query.order_by(Application.submitted_at.desc(), Application.id.desc()))).all()
+    return [_form_application_out(row) for row in rows]
 
-    result = []
-    for app in applications:
-        # get form information
-        form = db.query(Form).filter(Form.id == app.form_id).first()
-        if not form:
-            continue
 
-        # get club information
-        club = db.query(Club).filter(Club.cid == form.club_id).first()
-        if not club:
-            continue
+async def get_user_applications(db: AsyncSession, user_data=Depends(get_current_user)) -> List:
+    user_uid = user_data.get("uid")
+    if not user_uid:
+        raise HTTPException(status_code=401, detail="User not authenticated")
 
-        app_dict = {"id": app.id, "form_id": app.form_id, "form_name": form.name, "club_id": form.club_id,
-            "club_name": club.name if club else "Unknown", "status": app.status.name,
+    # query applications with form and club information (applications whose form or club is gone are skipped)
+    rows = (await db.execute(
+        select(Application, Form.name, Form.club_id, Club.name)
+        .join(Form, Form.id == Application.form_id)
+        .join(Club, Club.cid == Form.club_id)
+        .where(Application.user_id == user_uid))).all()
+
+    result = []
+    for app, form_name, club_id, club_name in rows:
+        app_dict = {"id": app.id, "form_id": app.form_id, "form_name": form_name, "club_id": club_id,
+            "club_name": club_name if club_name else "Unknown", "status": app.status.name,
             "endorser_ids": app.endorser_ids if app.endorser_ids else [],
-            "endorser_count": len(app.endorser_ids) if app.endorser_ids else 0,
+            "endorser_count": app.endorser_count,
             "submitted_at": app.submitted_at.isoformat(), }
         result.append(app_dict)
 
@@ -6,16 +6,16 @@ from sqlalchemy import (
     ForeignKey,
     Text,
     DateTime,
+    Index,
     UniqueConstraint,
 
     String,
+    text,
 )
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from utils.database_utils import Base
 
-from datetime import datetime, timezone
-
 
 class ApplicationStatus(enum.Enum):
     ongoing = "ongoing"
@@ -30,17 +30,19 @@ class Application(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     form_id = Column(
-        Integer, ForeignKey("forms.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("forms.id", ondelete="CASCADE"), nullable=False, index=True
     )
     user_id = Column(
         String, ForeignKey("users.uid", ondelete="CASCADE"), nullable=False
     )
     __table_args__ = (
         UniqueConstraint("user_id", "form_id", name="uq_user_id_form_id"),
-
+        # backs "applications I have endorsed" (endorser_ids @> ARRAY[uid])
+        Index("ix_applications_endorser_ids", "endorser_ids", postgresql_using="gin"),
     )
 
-    submitted_at = Column(DateTime, default=datetime.now(timezone.utc))
+    # naive utc. never null, it is the sort key of the form applications listing (and its pagination cursor).
+    submitted_at = Column(DateTime, nullable=False, server_default=text("(now() AT TIME ZONE 'utc')"))
 
     form = relationship("Form", back_populates="applications")
     responses = relationship(
@@ -50,7 +52,12 @@ class Application(Base):
     status = Column(Enum(ApplicationStatus), default=ApplicationStatus.ongoing)
 
     # TODO: referential integrity through user ids?
-    endorser_ids = Column(ARRAY(String), default=[])
+    endorser_ids = Column(ARRAY(String), default=[], server_default="{}")
+    # kept in step with endorser_ids by the endorse/withdraw updates, so listings do not count arrays
+    endorser_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # client supplied key of the submission that created this application, so retried submissions are recognised.
+    idempotency_key = Column(String, nullable=True)
 
 
 class Response(Base):
@@ -59,7 +66,7 @@ class Response(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     application_id = Column(
-        Integer, ForeignKey("applications.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("applications.id", ondelete="CASCADE"), nullable=False, index=True
     )
     question_id = Column(
         Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False
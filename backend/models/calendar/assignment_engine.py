@@ -0,0 +1,265 @@
+"""
+Assignment of applicants to interview slots.
+
+An assigner takes the applicants (with a priority, the windows they are available in and the times they are already
+busy) and the slots (with the number of panels still free in them), and returns the slot each applicant gets. Applicants that cannot be placed are
+left out. The engine is picked with ASSIGNMENT_ENGINE:
+
+- "matching": a maximum matching, found with augmenting paths (Kuhn's algorithm, extended to slot capacities).
+  Applicants are added in priority order and an applicant already placed is only ever moved to another slot, never
+  dropped, so when there are not enough slots the higher priority applicants are the ones that get one. Falls back
+  to greedy for the remaining applicants if it runs over ASSIGNMENT_TIME_BUDGET_SECONDS.
+- "greedy": each applicant, in priority order, takes the earliest slot they are available in that has room.
+"""
+
+import bisect
+import logging
+from datetime import datetime
+from os import getenv
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+ASSIGNMENT_ENGINE = getenv("ASSIGNMENT_ENGINE", "matching")
+# the matching engine places the applicants it has not reached by then greedily.
+ASSIGNMENT_TIME_BUDGET_SECONDS = float(getenv("ASSIGNMENT_TIME_BUDGET_SECONDS", 2))
+
+logger = logging.getLogger(__name__)
+
+
+class IntervalIndex:
+    """
+    (start, end) intervals, merged and sorted, answering "does [start, end) overlap any of them" with a binary search.
+    """
+
+    def __init__(self, intervals: List[Tuple[datetime, datetime]]):
+        merged: List[List[datetime]] = []
+        for start, end in sorted(intervals):
+            if merged and start < merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __iter__(self) -> Iterator[Tuple[datetime, datetime]]:
+        return zip(self._starts, self._ends)
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        # merged intervals do not overlap each other, so the last one starting before `end` also ends last
+        i = bisect.bisect_left(self._starts, end) - 1
+        return i >= 0 and self._ends[i] > start
+
+
+class Applicant(NamedTuple):
+    key: str
+    # higher goes first, ties keep the order applicants were given in
+    priority: int = 0
+    # (start, end) windows the applicant is available in. None means always available.
+    availability: Optional[List[Tuple[datetime, datetime]]] = None
+    # times the applicant is already busy (e.g. interviews with other clubs). slots overlapping them are skipped.
+    busy: Optional[IntervalIndex] = None
+
+
+class SlotCapacity(NamedTuple):
+    slot_id: int
+    start: datetime
+    end: datetime
+    # number of interviews the slot can still take (its free panels)
+    capacity: int
+
+
+Assigner = Callable[[List[Applicant], List[SlotCapacity]], Dict[str, int]]
+
+
+class _Schedule:
+    """
+    Slots in chronological order with their remaining capacity, and the candidate slots of every applicant.
+    """
+
+    def __init__(self, applicants: List[Applicant], slots: List[SlotCapacity]):
+        # stable sort, so equal priorities keep their order
+        self.applicants = sorted(applicants, key=lambda applicant: -applicant.priority)
+        self.slots = sorted(slots, key=lambda slot: (slot.start, slot.slot_id))
+        self.remaining = [max(slot.capacity, 0) for slot in self.slots]
+        self.assigned_slot = [-1] * len(self.applicants)
+        self._starts = [slot.start for slot in self.slots]
+        self._candidates: Dict[int, Sequence[int]] = {}
+        # every slot before this one is full (capacity only goes down, so it only moves forward)
+        self._first_free = 0
+
+    def candidates(self, applicant: int) -> Sequence[int]:
+        """Indices of the slots the applicant is available for (and not busy in), in chronological order."""
+        if applicant not in self._candidates:
+            availability, busy = self.applicants[applicant].availability, self.applicants[applicant].busy
+            if availability is None:
+                indices = range(len(self.slots))
+            else:
+                window_indices = set()
+                for window_start, window_end in availability:
+                    i = bisect.bisect_left(self._starts, window_start)
+                    while i < len(self.slots) and self.slots[i].start < window_end:
+                        if self.slots[i].end <= window_end:
+                            window_indices.add(i)
+                        i += 1
+                indices = sorted(window_indices)
+            if busy:
+                indices = [i for i in indices if not busy.overlaps(self.slots[i].start, self.slots[i].end)]
+            self._candidates[applicant] = indices
+        return self._candidates[applicant]
+
+    def earliest_free(self, applicant: int) -> int:
+        """The earliest candidate slot of the applicant with room left, or -1."""
+        while self._first_free < len(self.slots) and self.remaining[self._first_free] == 0:
+            self._first_free += 1
+
+        candidates = self.candidates(applicant)
+        for i in range(bisect.bisect_left(candidates, self._first_free), len(candidates)):
+            if self.remaining[candidates[i]] > 0:
+                return candidates[i]
+        return -1
+
+    def place(self, applicant: int, slot: int) -> None:
+        self.remaining[slot] -= 1
+        self.assigned_slot[applicant] = slot
+
+    def place_greedily(self, applicants: Sequence[int]) -> None:
+        for applicant in applicants:
+            slot = self.earliest_free(applicant)
+            if slot >= 0:
+                self.place(applicant, slot)
+
+    def result(self) -> Dict[str, int]:
+        return {self.applicants[applicant].key: self.slots[slot].slot_id
+                for applicant, slot in enumerate(self.assigned_slot) if slot >= 0}
+
+
+def assign_greedy(applicants: List[Applicant], slots: List[SlotCapacity]) -> Dict[str, int]:
+    schedule = _Schedule(applicants, slots)
+    schedule.place_greedily(range(len(schedule.applicants)))
+    return schedule.result()
+
+
+def assign_matching(applicants: List[Applicant], slots: List[SlotCapacity],
+        time_budget: float = ASSIGNMENT_TIME_BUDGET_SECONDS) -> Dict[str, int]:
+    schedule = _Schedule(applicants, slots)
+    occupants: List[List[int]] = [[] for _ in schedule.slots]
+    total_capacity = sum(schedule.remaining)
+    placed = 0
+    # slots seen by the searches since the last placement. a failed search does not change the assignment, so the
+    # slots it saw still cannot lead to a free slot and the next search can skip them.
+    visited = bytearray(len(schedule.slots))
+    deadline = perf_counter() + time_budget
+
+    def augment(root: int) -> bool:
+        # depth first search for a chain of moves ending in a slot with room: root takes slot s1, the applicant it
+        # displaces takes s2, and so on. frames[i] yields the (applicant, slot) moves out of the i-th slot on the path.
+        frames = [iter([(root, slot) for slot in schedule.candidates(root)])]
+        moves: List[Tuple[int, int]] = []
+        while frames:
+            for applicant, slot in frames[-1]:
+                if visited[slot]:
+                    continue
+                visited[slot] = 1
+                moves.append((applicant, slot))
+                if schedule.remaining[slot] > 0:
+                    for moved, new_slot in moves:
+                        old_slot = schedule.assigned_slot[moved]
+                        if old_slot >= 0:
+                            occupants[old_slot].remove(moved)
+                            schedule.remaining[old_slot] += 1
+                        occupants[new_slot].append(moved)
+                        schedule.place(moved, new_slot)
+                    return True
+                frames.append((occupant, next_slot) for occupant in list(occupants[slot])
+                              for next_slot in schedule.candidates(occupant))
+                break
+            else:
+                frames.pop()
+                if moves:
+                    moves.pop()
+        return False
+
+    for applicant in range(len(schedule.applicants)):
+        if placed == total_capacity:
+            break
+        if perf_counter() > deadline:
+            logger.warning(f"Matching ran over {time_budget}s, placing the last "
+                           f"{len(schedule.applicants) - applicant} applicants greedily")
+            schedule.place_greedily(range(applicant, len(schedule.applicants)))
+            break
+
+        # most applicants fit in a free slot directly, only search when none is left
+        slot = schedule.earliest_free(applicant)
+        if slot >= 0:
+            occupants[slot].append(applicant)
+            schedule.place(applicant, slot)
+            placed += 1
+        elif augment(applicant):
+            placed += 1
+            visited = bytearray(len(schedule.slots))
+
+    return schedule.result()
+
+
+ASSIGNERS: Dict[str, Assigner] = {"matching": assign_matching, "greedy": assign_greedy, }
+
+
+def assign(applicants: List[Applicant], slots: List[SlotCapacity], engine: str = ASSIGNMENT_ENGINE) -> Dict[str, int]:
+    """
+    Assign applicants to slots with the given engine. Returns {applicant key: slot id} for the applicants placed.
+    """
+    if engine not in ASSIGNERS:
+        raise ValueError(f"Unknown assignment engine {engine!r}, expected one of {', '.join(ASSIGNERS)}")
+    return ASSIGNERS[engine](applicants, slots)
+
+
+if __name__ == "__main__":
+    # benchmark of the engines on synthetic schedules (no database needed).
+    # usage (from backend/): python -m models.calendar.assignment_engine
+    import random
+    from datetime import timedelta
+
+    def synthetic_schedule(applicant_count: int, days: int, panels: int, windows_per_applicant: Optional[int],
+            busy_per_applicant: int = 0, seed: int = 0) -> Tuple[List[Applicant], List[SlotCapacity]]:
+        rng = random.Random(seed)
+        first_day = datetime(2025, 4, 20, 9)
+        slots = [SlotCapacity(slot_id=day * 100 + i, start=first_day + timedelta(days=day, minutes=10 * i),
+                              end=first_day + timedelta(days=day, minutes=10 * (i + 1)), capacity=panels)
+                 for day in range(days) for i in range(66)]  # 09:00 to 20:00
+
+        applicants = []
+        for i in range(applicant_count):
+            availability = None
+            if windows_per_applicant is not None:
+                availability = []
+                for _ in range(windows_per_applicant):
+                    start = rng.choice(slots).start
+                    availability.append((start, start + timedelta(hours=rng.choice([1, 2, 3]))))
+            # interviews with other clubs, not aligned to this schedule's slots
+            busy = [(start, start + timedelta(minutes=30))
+                    for start in (rng.choice(slots).start + timedelta(minutes=5) for _ in range(busy_per_applicant))]
+            applicants.append(Applicant(key=f"applicant-{i}", priority=rng.randint(0, 10), availability=availability,
+                                        busy=IntervalIndex(busy)))
+        return applicants, slots
+
+    scenarios = [
+        ("500 applicants, 2 days x 4 panels, always available", (500, 2, 4, None)),
+        ("1200 applicants, 5 days x 4 panels, 1 window each", (1200, 5, 4, 1)),
+        ("3000 applicants, 5 days x 10 panels, 2 windows each", (3000, 5, 10, 2)),
+        ("5000 applicants, 3 days x 10 panels (oversubscribed), 2 windows each", (5000, 3, 10, 2)),
+        ("6000 applicants, 10 days x 10 panels, 1 window each", (6000, 10, 10, 1)),
+        ("3000 applicants, 5 days x 10 panels, 2 windows and 3 other interviews each", (3000, 5, 10, 2, 3)),
+    ]
+
+    for name, parameters in scenarios:
+        applicants, slots = synthetic_schedule(*parameters)
+        capacity = sum(slot.capacity for slot in slots)
+        print(f"{name}: {len(applicants)} applicants, {len(slots)} slots, capacity {capacity}")
+        for engine in ASSIGNERS:
+            started_at = perf_counter()
+            assignment = assign(applicants, slots, engine)
+            elapsed_ms = (perf_counter() - started_at) * 1000
+            print(f"  {engine:>8}: placed {len(assignment)} in {elapsed_ms:.1f} ms")
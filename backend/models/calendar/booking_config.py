@@ -0,0 +1,359 @@
+"""
+Applicants booking their own interview slot in a published schedule.
+
+A slot holds at most num_panels interviews, and its booked_count is the number of seats taken. A booking reserves a
+seat with a guarded update (booked_count + 1 only while it is below num_panels), so two requests cannot take the last
+seat of a slot even when hundreds arrive at once, and the slot row stays locked until the booking commits, which
+makes picking its free panel safe. "Any slot" requests take the earliest slot with room that nobody else is booking
+right now (FOR UPDATE SKIP LOCKED), so a burst of them spreads over the slots instead of queueing on the first one.
+When every slot with room is being booked, they wait for one and try again if it filled up, so they are only turned
+away once no slot has a seat left.
+The applicant's application row is locked for the whole booking, so an applicant cannot book twice.
+"""
+
+import logging
+from datetime import datetime
+from os import getenv
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import and_, delete, func, not_, or_, select, update
+from sqlalchemy.orm import Session
+
+from models.applications.applications_model import Application, ApplicationStatus
+from models.calendar.calendar_events_model import CalendarEvent
+from models.calendar.interview_models import InterviewPanel, InterviewSchedule, InterviewSlot
+from models.calendar.interviews_config import adjust_booked_counts, create_interview_events, get_busy_intervals
+from models.users.users_model import User
+from utils.cache_utils import TTLCache
+
+# availability is served from memory for this long. bookings made through this worker refresh it right away.
+BOOKING_AVAILABILITY_CACHE_SECONDS = float(getenv("BOOKING_AVAILABILITY_CACHE_SECONDS", 2))
+
+logger = logging.getLogger(__name__)
+
+availability_cache = TTLCache(max_size=1000, ttl=BOOKING_AVAILABILITY_CACHE_SECONDS)
+
+
+class BookingRequest(BaseModel):
+    # the slot to book, or None for the earliest slot with room
+    slot_id: Optional[int] = None
+
+
+def publish_schedule(db: Session, schedule_id: int) -> datetime:
+    """
+    Open a schedule for applicants to book their own slots (publishing it again keeps the first time). Returns when
+    it was published.
+    """
+    published_at = db.scalar(
+        update(InterviewSchedule)
+        .where(InterviewSchedule.id == schedule_id)
+        .values(published_at=func.coalesce(InterviewSchedule.published_at, func.now()))
+        .returning(InterviewSchedule.published_at)
+    )
+    db.commit()
+    availability_cache.pop(schedule_id)
+    return published_at
+
+
+def get_published_schedule(form_id: int, db: Session) -> InterviewSchedule:
+    schedule = db.query(InterviewSchedule).filter(
+        InterviewSchedule.form_id == form_id,
+        InterviewSchedule.published_at.is_not(None),
+    ).order_by(InterviewSchedule.id.desc()).first()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="No interview schedule has been published for this form")
+    return schedule
+
+
+def get_availability(schedule: InterviewSchedule, db: Session) -> List[Dict[str, Any]]:
+    """
+    The slots of a published schedule with the seats left in each, in chronological order. Cached for
+    BOOKING_AVAILABILITY_CACHE_SECONDS, so a burst of applicants refreshing the page costs one query per worker.
+    """
+    availability = availability_cache.get(schedule.id)
+    if availability is None:
+        availability = [
+            {
+                "slot_id": slot_id,
+                "date": slot_date,
+                "start_time": start_time,
+                "end_time": end_time,
+                "seats_left": max(schedule.num_panels - booked_count, 0),
+            }
+            for slot_id, slot_date, start_time, end_time, booked_count in db.execute(
+                select(
+                    InterviewSlot.id,
+                    InterviewSlot.date,
+                    InterviewSlot.start_time,
+                    InterviewSlot.end_time,
+                    InterviewSlot.booked_count,
+                )
+                .where(InterviewSlot.interview_schedule_id == schedule.id)
+                .order_by(InterviewSlot.date, InterviewSlot.start_time, InterviewSlot.id)
+            )
+        ]
+        availability_cache.set(schedule.id, availability)
+    return availability
+
+
+# lock the first of the candidate slots that has room. returns None only when none of them has room.
+def _lock_free_slot(db: Session, candidates) -> Optional[int]:
+    while True:
+        # slots being booked by someone else are skipped rather than waited for
+        slot_id = db.scalar(candidates.with_for_update(skip_locked=True))
+        if slot_id is not None:
+            return slot_id
+        # every slot with room is being booked by someone else, or none is left, and then there is nothing to wait for
+        if db.scalar(candidates) is None:
+            return None
+        # otherwise wait for them. this only sees the seats free when it started, so it comes back empty when those
+        # bookings took them all, and then seats freed since are looked for again. every round either locks a slot,
+        # finds no room or sees slots fill up.
+        slot_id = db.scalar(candidates.with_for_update())
+        if slot_id is not None:
+            return slot_id
+
+
+# reserve a seat in the given slot of the schedule, or in the earliest slot with room that does not clash with the
+# applicant's other interviews. returns the slot, locked until the caller commits, or None if there is no seat.
+def _reserve_seat(db: Session, schedule: InterviewSchedule, slot_id: Optional[int], busy) -> Optional[InterviewSlot]:
+    has_room = InterviewSlot.booked_count < schedule.num_panels
+    if slot_id is None:
+        slot_start = InterviewSlot.date + InterviewSlot.start_time
+        slot_end = InterviewSlot.date + InterviewSlot.end_time
+        conditions = [InterviewSlot.interview_schedule_id == schedule.id, has_room]
+        if busy:
+            conditions.append(not_(or_(*(and_(slot_start < end, slot_end > start) for start, end in busy))))
+        candidates = (
+            select(InterviewSlot.id)
+            .where(*conditions)
+            .order_by(InterviewSlot.date, InterviewSlot.start_time, InterviewSlot.id)
+            .limit(1)
+        )
+        slot_id = _lock_free_slot(db, candidates)
+        if slot_id is None:
+            return None
+
+    # the guarded increment is what rules out overselling: a concurrent update of the slot waits for this one and then
+    # re-checks the condition against the new count
+    reserved_slot_id = db.scalar(
+        update(InterviewSlot)
+        .where(InterviewSlot.id == slot_id, InterviewSlot.interview_schedule_id == schedule.id, has_room)
+        .values(booked_count=InterviewSlot.booked_count + 1)
+        .returning(InterviewSlot.id)
+    )
+    if reserved_slot_id is None:
+        return None
+    return db.get(InterviewSlot, reserved_slot_id)
+
+
+def book_interview(form_id: int, user_id: str, db: Session, slot_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Book an interview in the published schedule of a form for an applicant, in the given slot or in the earliest slot
+    with room. Slots that clash with the applicant's interviews for other forms cannot be booked. The applicant is
+    emailed once the booking is committed.
+    """
+    started_at = perf_counter()
+    schedule = get_published_schedule(form_id, db)
+
+    # locking the application makes concurrent bookings of the same applicant run one after the other
+    applicant = db.execute(
+        select(Application.user_id, Application.status, User.first_name, User.last_name, User.email)
+        .join(User, User.uid == Application.user_id)
+        .where(Application.form_id == form_id, Application.user_id == user_id)
+        .with_for_update(of=Application)
+    ).first()
+    if not applicant or applicant.status == ApplicationStatus.rejected:
+        db.rollback()
+        raise HTTPException(status_code=403, detail="You do not have an active application for this form")
+
+    if db.scalar(select(CalendarEvent.id).where(
+        CalendarEvent.interview_schedule_id == schedule.id,
+        CalendarEvent.visible_to_user == user_id,
+    ).limit(1)) is not None:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="You already have an interview for this form")
+
+    busy = get_busy_intervals(db, [user_id], None, form_id).get(user_id)
+    if slot_id is not None:
+        requested_slot = db.get(InterviewSlot, slot_id)
+        if not requested_slot or requested_slot.interview_schedule_id != schedule.id:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Interview slot not found")
+        if busy and busy.overlaps(datetime.combine(requested_slot.date, requested_slot.start_time),
+                                  datetime.combine(requested_slot.date, requested_slot.end_time)):
+            db.rollback()
+            raise HTTPException(status_code=409, detail="This slot clashes with another of your interviews")
+
+    interview_slot = _reserve_seat(db, schedule, slot_id, busy)
+    if interview_slot is None:
+        db.rollback()
+        availability_cache.pop(schedule.id)
+        raise HTTPException(status_code=409, detail="This slot is full" if slot_id is not None
+                            else "There are no interview slots left")
+
+    # the slot row is locked by the reservation, so nobody else is picking a panel in it
+    taken_panel_ids = set(db.scalars(select(CalendarEvent.panel_id).where(
+        CalendarEvent.interview_slot_id == interview_slot.id)))
+    panel_id = next((panel_id for panel_id in db.scalars(
+        select(InterviewPanel.id)
+        .where(InterviewPanel.interview_schedule_id == schedule.id)
+        .order_by(InterviewPanel.id)
+        .limit(schedule.num_panels)
+    ) if panel_id not in taken_panel_ids), None)
+    if panel_id is None:
+        db.rollback()
+        logger.error(f"Slot {interview_slot.id} has a seat left but no free panel")
+        raise HTTPException(status_code=409, detail="This slot is full")
+
+    [event_id] = create_interview_events(db, schedule.id, schedule.club_id, form_id,
+                                         [(applicant, (interview_slot.id, panel_id))],
+                                         {interview_slot.id: interview_slot}, update_booked_counts=False)
+    booking = {
+        "event_id": event_id,
+        "slot_id": interview_slot.id,
+        "panel_id": panel_id,
+        "date": interview_slot.date,
+        "start_time": interview_slot.start_time,
+        "end_time": interview_slot.end_time,
+    }
+    db.commit()
+    availability_cache.pop(schedule.id)
+
+    logger.info(f"Booked slot {booking['slot_id']} for {user_id} in {(perf_counter() - started_at) * 1000:.1f} ms")
+    return booking
+
+
+def cancel_booking(form_id: int, user_id: str, db: Session) -> Dict[str, Any]:
+    """
+    Cancel an applicant's interview in the published schedule of a form, freeing its seat for others to book.
+    """
+    schedule = get_published_schedule(form_id, db)
+    freed_slot_ids = db.scalars(
+        delete(CalendarEvent)
+        .where(CalendarEvent.interview_schedule_id == schedule.id, CalendarEvent.visible_to_user == user_id)
+        .returning(CalendarEvent.interview_slot_id)
+    ).all()
+    if not freed_slot_ids:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="You do not have an interview for this form")
+
+    adjust_booked_counts(db, freed_slot_ids, -1)
+    db.commit()
+    availability_cache.pop(schedule.id)
+    return {"success": True, "message": "Interview cancelled"}
+
+
+if __name__ == "__main__":
+    # load test: a burst of concurrent bookings against a published schedule, half of them for the same few slots,
+    # then checks that no slot holds more interviews than it has panels. bookings commit, so this creates its own
+    # club, form and applicants, and deletes them afterwards.
+    # usage (from backend/): python -m models.calendar.booking_config [applicants] [threads] [slots] [panels]
+    import sys
+    import threading
+    from collections import Counter
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import date, time, timedelta
+
+    from sqlalchemy import insert
+
+    from models.clubs.clubs_model import Club
+    from models.club_recruitment.club_recruitment_model import Form
+    from models.calendar.interviews_config import create_schedule
+    from models.notifications.notifications_model import OutboxEmail
+    from utils.database_utils import SessionLocal
+
+    applicant_count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    thread_count = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    slot_count = int(sys.argv[3]) if len(sys.argv) > 3 else 60
+    panels = int(sys.argv[4]) if len(sys.argv) > 4 else 3
+    club_id = "booking-load-test"
+
+    db = SessionLocal()
+    first_outbox_id = db.scalar(select(func.coalesce(func.max(OutboxEmail.id), 0)))
+    db.add(Club(cid=club_id, name="Booking Load Test", email="booking-load-test@example.com"))
+    db.flush()
+    form = Form(name="Booking Load Test", club_id=club_id)
+    db.add(form)
+    db.flush()
+    form_id = form.id
+    user_ids = [f"{club_id}-{i}" for i in range(applicant_count)]
+    db.execute(insert(User), [
+        {"uid": uid, "email": f"{uid}@example.com", "first_name": "Load", "last_name": str(i), "roll_number": uid}
+        for i, uid in enumerate(user_ids)
+    ])
+    db.execute(insert(Application), [{"form_id": form_id, "user_id": uid} for uid in user_ids])
+    db.commit()
+    first_slot = datetime.combine(date(2025, 4, 20), time(9))
+    schedule_id, slot_ids, _ = create_schedule(
+        club_id=club_id,
+        form_id=form_id,
+        slots=[(start, start + timedelta(minutes=10), start.date())
+               for start in (first_slot + timedelta(minutes=10 * i) for i in range(slot_count))],
+        slot_length=10,
+        num_panels=panels,
+        db=db,
+    )
+    publish_schedule(db, schedule_id)
+    hot_slot_ids = slot_ids[:3]
+
+    barrier = threading.Barrier(thread_count)
+
+    def book(i: int):
+        if i < thread_count:
+            # release the first wave together
+            barrier.wait()
+        session = SessionLocal()
+        try:
+            return book_interview(form_id, user_ids[i], session, hot_slot_ids[i % 3] if i % 2 else None)
+        except HTTPException as e:
+            return e.status_code
+        finally:
+            session.close()
+
+    try:
+        started_at = perf_counter()
+        with ThreadPoolExecutor(thread_count) as pool:
+            results = list(pool.map(book, range(applicant_count)))
+        elapsed = perf_counter() - started_at
+
+        booked = [result for result in results if isinstance(result, dict)]
+        events = db.execute(select(CalendarEvent.interview_slot_id, CalendarEvent.panel_id,
+                                   CalendarEvent.visible_to_user)
+                            .where(CalendarEvent.interview_schedule_id == schedule_id)).all()
+        events_per_slot = Counter(slot_id for slot_id, _, _ in events)
+        booked_counts = dict(db.execute(select(InterviewSlot.id, InterviewSlot.booked_count)
+                                        .where(InterviewSlot.interview_schedule_id == schedule_id)).all())
+
+        assert len(booked) == len(events), "a booking reported success without an event"
+        assert max(events_per_slot.values(), default=0) <= panels, "a slot was oversold"
+        assert all(booked_counts[slot_id] == events_per_slot.get(slot_id, 0) for slot_id in booked_counts), \
+            "booked_count drifted from the events"
+        assert len({(slot_id, panel_id) for slot_id, panel_id, _ in events}) == len(events), "a panel was double booked"
+        assert len({user_id for _, _, user_id in events}) == len(events), "an applicant was booked twice"
+        refused_any_slot = [result for i, result in enumerate(results) if not isinstance(result, dict) and not i % 2]
+        assert not refused_any_slot or len(events) == slot_count * panels, "a request was refused with seats left"
+        hot_requests = Counter(hot_slot_ids[i % 3] for i in range(1, applicant_count, 2))
+        assert all(events_per_slot[slot_id] >= min(panels, hot_requests[slot_id]) for slot_id in hot_slot_ids), \
+            "a contested slot was left with seats"
+
+        print(f"{applicant_count} booking requests from {thread_count} threads in {elapsed:.2f} s "
+              f"({applicant_count / elapsed:.0f}/s): {len(booked)} booked, "
+              f"{dict(Counter(result for result in results if not isinstance(result, dict)))} refused, "
+              f"capacity {slot_count * panels}, none oversold")
+    finally:
+        db.rollback()
+        db.execute(delete(CalendarEvent).where(CalendarEvent.interview_schedule_id == schedule_id))
+        db.execute(delete(InterviewSlot).where(InterviewSlot.interview_schedule_id == schedule_id))
+        db.execute(delete(InterviewPanel).where(InterviewPanel.interview_schedule_id == schedule_id))
+        db.execute(delete(InterviewSchedule).where(InterviewSchedule.id == schedule_id))
+        db.execute(delete(OutboxEmail).where(OutboxEmail.id > first_outbox_id))
+        db.execute(delete(Application).where(Application.form_id == form_id))
+        db.execute(delete(User).where(User.uid.in_(user_ids)))
+        db.execute(delete(Form).where(Form.id == form_id))
+        db.execute(delete(Club).where(Club.cid == club_id))
+        db.commit()
+        db.close()
@@ -21,6 +21,7 @@ class CalendarEvent(Base):
         Integer,
         ForeignKey("interview_schedule.id"),
         nullable=True,
+        index=True,
     )
     interview_schedule = relationship(
         "InterviewSchedule",
@@ -55,6 +56,7 @@ class CalendarEvent(Base):
         String,
         ForeignKey("users.uid"),
         nullable=True,
+        index=True,
     )
     # user = relationship(
     #     "User",
@@ -66,6 +68,7 @@ class CalendarEvent(Base):
         String,
         ForeignKey("clubs.cid"),
         nullable=True,
+        index=True,
     )
     # club = relationship(
     #     "Club",
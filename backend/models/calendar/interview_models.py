@@ -1,11 +1,14 @@
 from sqlalchemy import (
     Column,
+    DateTime,
     Integer,
     String,
     Enum,
     ForeignKey,
     Time,
     Date,
+    Index,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 from utils.database_utils import Base
@@ -13,12 +16,21 @@ from utils.database_utils import Base
 
 class InterviewSlot(Base):
     __tablename__ = "interview_slot"
+    __table_args__ = (
+        # a slot exists once per schedule, so create_schedule can upsert them
+        UniqueConstraint("interview_schedule_id", "date", "start_time", "end_time",
+                         name="uq_interview_slot_schedule_date_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
     date = Column(Date, nullable=False)
 
+    # interviews in this slot, at most the schedule's num_panels. self-booking reserves a seat by incrementing it
+    # with a guarded update, see booking_config.
+    booked_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     interview_schedule_id = Column(
         Integer,
         ForeignKey("interview_schedule.id"),
@@ -49,6 +61,7 @@ class InterviewPanel(Base):
         Integer,
         ForeignKey("interview_schedule.id"),
         nullable=False,
+        index=True,
     )
     interview_schedule = relationship(
         "InterviewSchedule",
@@ -71,6 +84,7 @@ class InterviewPanel(Base):
 
 class InterviewSchedule(Base):
     __tablename__ = "interview_schedule"
+    __table_args__ = (Index("ix_interview_schedule_form_id_club_id", "form_id", "club_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -97,3 +111,6 @@ class InterviewSchedule(Base):
 
     slot_length = Column(Integer, nullable=False)  # in minutes
     num_panels = Column(Integer, nullable=False)
+
+    # set once the club publishes the schedule for applicants to book their own slots
+    published_at = Column(DateTime, nullable=True)
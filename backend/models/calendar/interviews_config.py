@@ -1,17 +1,27 @@
+import logging
+from collections import Counter
+from itertools import islice
+from time import perf_counter
+
 from pydantic import BaseModel
-from typing import List, Tuple
-from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Set, Tuple
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import bindparam, delete, exists, insert, or_, select, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from models.applications.applications_model import Application
+from models.applications.applications_model import Application, ApplicationStatus
 from models.calendar.interview_models import (
     InterviewSlot,
     InterviewSchedule,
     InterviewPanel,
 )
+from models.calendar.assignment_engine import ASSIGNMENT_ENGINE, Applicant, IntervalIndex, SlotCapacity, assign
 from models.calendar.calendar_events_model import CalendarEvent, CalendarEventType
+from models.notifications.notifications_config import enqueue_email
 from models.users.users_model import User
-from models.users.users_config import inform_users
+
+logger = logging.getLogger(__name__)
 
 
 # Pydantic models to validate the incoming JSON data
@@ -67,6 +77,12 @@ def parse_schedule_interview_form_data(
                 return False
         return True
 
+    # a zero slot length would never finish generating slots
+    if form_data.interviewSchedule.slotDurationMinutes <= 0:
+        raise ValueError("Slot duration must be positive")
+    if form_data.interviewSchedule.interviewPanelCount <= 0:
+        raise ValueError("Panel count must be positive")
+
     # convert all dates and times to datetime objects
     for date_schedule in form_data.interviewSchedule.dates:
         date_schedule.date = datetime.strptime(
@@ -94,13 +110,11 @@ def parse_schedule_interview_form_data(
     return form_data
 
 
-def calculate_interview_slots(
+def iter_interview_slots(
     form_data: ScheduleInterviewFormResponseDatetime,
-) -> List[Tuple[datetime]]:
-
-    # calculate interview slots based on the form data
-    # return a list of tuples (start_time, end_time, date)
-    interview_slots: List[Tuple[datetime]] = []
+) -> Iterator[Tuple[datetime, datetime, date]]:
+    # generate the interview slots of the form data lazily, as tuples (start_time, end_time, date)
+    slot_duration = timedelta(minutes=form_data.interviewSchedule.slotDurationMinutes)
 
     for date_schedule in form_data.interviewSchedule.dates:
         for time_range in date_schedule.timeRanges:
@@ -112,18 +126,33 @@ def calculate_interview_slots(
                 date_schedule.date,
                 time_range.endTime,
             )
-            slot_duration = form_data.interviewSchedule.slotDurationMinutes
-            while start_time + timedelta(minutes=slot_duration) <= end_time:
-                interview_slots.append(
-                    [
-                        start_time,
-                        start_time + timedelta(minutes=slot_duration),
-                        date_schedule.date,
-                    ]
-                )
-                start_time += timedelta(minutes=slot_duration)
+            while start_time + slot_duration <= end_time:
+                yield start_time, start_time + slot_duration, date_schedule.date
+                start_time += slot_duration
+
+
+def count_interview_slots(form_data: ScheduleInterviewFormResponseDatetime) -> int:
+    # number of slots iter_interview_slots generates, without generating them
+    slot_duration = timedelta(minutes=form_data.interviewSchedule.slotDurationMinutes)
+    return sum(
+        max(
+            datetime.combine(date_schedule.date, time_range.endTime)
+            - datetime.combine(date_schedule.date, time_range.startTime),
+            timedelta(0),
+        )
+        // slot_duration
+        for date_schedule in form_data.interviewSchedule.dates
+        for time_range in date_schedule.timeRanges
+    )
 
-    return interview_slots
+
+def calculate_interview_slots(
+    form_data: ScheduleInterviewFormResponseDatetime,
+) -> List[Tuple[datetime, datetime, date]]:
+
+    # calculate interview slots based on the form data
+    # return a list of tuples (start_time, end_time, date)
+    return list(iter_interview_slots(form_data))
 
 
 def create_schedule(
@@ -134,9 +163,16 @@ def create_schedule(
     num_panels: int,
     db: Session,
 ) -> Tuple[int | List[int]]:
+    """
+    Create (or update) the interview schedule of a form with its slots and panels, and commit once.
+    Existing slots and panels are reused, so submitting the same schedule again only reads them. Slots and panels
+    left out of a resubmitted schedule are removed, and their applicants placed again (see remove_slots_and_panels).
+    Returns the schedule id, the slot ids in the order of `slots`, and `num_panels` panel ids.
+    """
+    started_at = perf_counter()
 
     # create interview schedule
-    exisiting_schedule = (
+    interview_schedule = (
         db.query(InterviewSchedule)
         .filter(
             InterviewSchedule.form_id == form_id,
@@ -145,7 +181,7 @@ def create_schedule(
         .first()
     )
 
-    if not exisiting_schedule:
+    if not interview_schedule:
         interview_schedule = InterviewSchedule(
             form_id=form_id,
             club_id=club_id,
@@ -153,71 +189,181 @@ def create_schedule(
             num_panels=num_panels,
         )
         db.add(interview_schedule)
-        db.commit()
-        db.refresh(interview_schedule)
+        db.flush()
     else:
-        interview_schedule = exisiting_schedule
+        interview_schedule.slot_length = slot_length
+        interview_schedule.num_panels = num_panels
 
     schedule_id: int = interview_schedule.id
 
-    # create interview slots
-    slot_ids: List[int] = []
-    for start_time, end_time, date in slots:
-        existing_slot = (
-            db.query(InterviewSlot)
-            .filter(
-                InterviewSlot.start_time == start_time.time(),
-                InterviewSlot.end_time == end_time.time(),
-                InterviewSlot.date == date,
-                InterviewSlot.interview_schedule_id == interview_schedule.id,
+    # create interview slots: only the ones missing from the schedule are inserted, in one statement
+    wanted_slots = [(date, start_time.time(), end_time.time()) for start_time, end_time, date in slots]
+    slot_id_by_key = _get_slot_ids(db, schedule_id)
+
+    missing_slots = [key for key in dict.fromkeys(wanted_slots) if key not in slot_id_by_key]
+    if missing_slots:
+        inserted = db.execute(
+            pg_insert(InterviewSlot)
+            .values(
+                [
+                    {
+                        "interview_schedule_id": schedule_id,
+                        "club_id": club_id,
+                        "date": date,
+                        "start_time": start_time,
+                        "end_time": end_time,
+                    }
+                    for date, start_time, end_time in missing_slots
+                ]
             )
-            .first()
-        )
-
-        if not existing_slot:
-            interview_slot = InterviewSlot(
-                start_time=start_time.time(),
-                end_time=end_time.time(),
-                date=date,
-                interview_schedule_id=interview_schedule.id,
-                club_id=club_id,
+            .on_conflict_do_nothing(constraint="uq_interview_slot_schedule_date_time")
+            .returning(
+                InterviewSlot.id,
+                InterviewSlot.date,
+                InterviewSlot.start_time,
+                InterviewSlot.end_time,
             )
-            db.add(interview_slot)
-            db.commit()
-            db.refresh(interview_slot)
-        else:
-            interview_slot = existing_slot
-
-        slot_ids.append(interview_slot.id)
-
-    # create interview panels
-    panel_ids: List[int] = []
-    for i in range(num_panels):
-        existing_panel = (
-            db.query(InterviewPanel)
-            .filter(
-                InterviewPanel.interview_schedule_id == interview_schedule.id,
+        ).all()
+        for slot_id, date, start_time, end_time in inserted:
+            slot_id_by_key[(date, start_time, end_time)] = slot_id
+
+        # slots inserted by a concurrent submission of the same schedule
+        if len(inserted) < len(missing_slots):
+            slot_id_by_key = _get_slot_ids(db, schedule_id)
+
+    slot_ids: List[int] = [slot_id_by_key[key] for key in wanted_slots]
+    removed_slot_ids = sorted(set(slot_id_by_key.values()) - set(slot_ids))
+
+    # create interview panels: reuse the existing ones and add the missing ones in one statement
+    panel_ids: List[int] = list(
+        db.scalars(
+            select(InterviewPanel.id)
+            .where(
+                InterviewPanel.interview_schedule_id == schedule_id,
                 InterviewPanel.club_id == club_id,
             )
-            .first()
+            .order_by(InterviewPanel.id)
         )
-
-        if not existing_panel:
-            interview_panel = InterviewPanel(
-                interview_schedule_id=interview_schedule.id,
-                club_id=club_id,
+    )
+    if len(panel_ids) < num_panels:
+        panel_ids += db.scalars(
+            insert(InterviewPanel)
+            .values(
+                [
+                    {"interview_schedule_id": schedule_id, "club_id": club_id}
+                    for _ in range(num_panels - len(panel_ids))
+                ]
             )
-            db.add(interview_panel)
-            db.commit()
-            db.refresh(interview_panel)
-        else:
-            interview_panel = existing_panel
+            .returning(InterviewPanel.id)
+        ).all()
+    panel_ids, removed_panel_ids = panel_ids[:num_panels], panel_ids[num_panels:]
 
-        panel_ids.append(interview_panel.id)
+    if removed_slot_ids or removed_panel_ids:
+        remove_slots_and_panels(db, schedule_id, club_id, form_id, removed_slot_ids, removed_panel_ids)
+
+    db.commit()
+
+    elapsed_ms = (perf_counter() - started_at) * 1000
+    logger.info(
+        f"Created schedule {schedule_id} for form {form_id}: {len(slot_ids)} slots "
+        f"({len(missing_slots)} new, {len(removed_slot_ids)} removed), {len(panel_ids)} panels "
+        f"({len(removed_panel_ids)} removed) in {elapsed_ms:.1f} ms"
+    )
 
     return schedule_id, slot_ids, panel_ids
 
 
+# ids of the slots of a schedule, by (date, start_time, end_time)
+def _get_slot_ids(db: Session, schedule_id: int) -> Dict[Tuple[date, time, time], int]:
+    return {
+        (slot_date, start_time, end_time): slot_id
+        for slot_id, slot_date, start_time, end_time in db.execute(
+            select(
+                InterviewSlot.id,
+                InterviewSlot.date,
+                InterviewSlot.start_time,
+                InterviewSlot.end_time,
+            ).where(InterviewSlot.interview_schedule_id == schedule_id)
+        )
+    }
+
+
+def remove_slots_and_panels(
+    db: Session,
+    schedule_id: int,
+    club_id: str,
+    form_id: int,
+    slot_ids: List[int],
+    panel_ids: List[int],
+    engine: str = ASSIGNMENT_ENGINE,
+) -> List[str]:
+    """
+    Remove slots and panels that a resubmitted schedule no longer has, with their interviews. The applicants of
+    those interviews are placed again in the free (slot, panel) cells left in the schedule, the most endorsed first,
+    and emailed that their interview was rescheduled, or cancelled if there was no room. Nobody else is emailed.
+    Does not commit. Returns the user ids of the applicants placed again.
+    """
+    # bookings of these slots wait for the removal, and then find them gone
+    db.execute(
+        select(InterviewSlot.id).where(InterviewSlot.id.in_(slot_ids)).order_by(InterviewSlot.id).with_for_update()
+    )
+    displaced = db.execute(
+        delete(CalendarEvent)
+        .where(
+            CalendarEvent.interview_schedule_id == schedule_id,
+            or_(CalendarEvent.interview_slot_id.in_(slot_ids), CalendarEvent.panel_id.in_(panel_ids)),
+        )
+        .returning(CalendarEvent.visible_to_user, CalendarEvent.interview_slot_id)
+    ).all()
+    # seats of the slots that stay (their interview was with a removed panel)
+    removed_slot_ids = set(slot_ids)
+    adjust_booked_counts(db, [slot_id for _, slot_id in displaced if slot_id not in removed_slot_ids], -1)
+    db.execute(delete(InterviewSlot).where(InterviewSlot.id.in_(slot_ids)))
+    db.execute(delete(InterviewPanel).where(InterviewPanel.id.in_(panel_ids)))
+
+    displaced_user_ids = {user_id for user_id, _ in displaced}
+    if not displaced_user_ids:
+        return []
+
+    # free cells of the schedule as it is now
+    slots_by_id: Dict[int, InterviewSlot] = {
+        slot.id: slot
+        for slot in db.query(InterviewSlot).filter(InterviewSlot.interview_schedule_id == schedule_id)
+    }
+    current_panel_ids = list(db.scalars(
+        select(InterviewPanel.id).where(InterviewPanel.interview_schedule_id == schedule_id).order_by(InterviewPanel.id)
+    ))
+    taken_cells = set(db.execute(
+        select(CalendarEvent.interview_slot_id, CalendarEvent.panel_id).where(
+            CalendarEvent.interview_schedule_id == schedule_id
+        )
+    ).all())
+    free_panels: Dict[int, List[int]] = {}
+    for slot in sorted(slots_by_id.values(), key=lambda slot: (slot.date, slot.start_time)):
+        panels = [panel_id for panel_id in current_panel_ids if (slot.id, panel_id) not in taken_cells]
+        if panels:
+            free_panels[slot.id] = panels
+
+    applicants = _query_applicants(db, form_id).filter(
+        Application.user_id.in_(displaced_user_ids),
+    ).order_by(Application.endorser_count.desc(), Application.id).all()
+    assignments = _assign_free_cells(db, form_id, applicants, free_panels, slots_by_id, engine)
+    create_interview_events(
+        db, schedule_id, club_id, form_id, assignments, slots_by_id, rescheduled_user_ids=displaced_user_ids
+    )
+
+    placed = {applicant.user_id for applicant, _ in assignments}
+    for applicant in applicants:
+        if applicant.user_id not in placed:
+            enqueue_cancellation_email(db, applicant, club_id, form_id)
+
+    logger.info(
+        f"Schedule {schedule_id}: removed {len(slot_ids)} slots and {len(panel_ids)} panels, "
+        f"rescheduled {len(placed)} of {len(displaced_user_ids)} interviews"
+    )
+    return list(placed)
+
+
 def allocate_calendar_events(
     schedule_id: int,
     slot_ids: List[int],
@@ -225,85 +371,554 @@ def allocate_calendar_events(
     db: Session,
     club_id: str,
     form_id: int,
+    engine: str = ASSIGNMENT_ENGINE,
 ):
+    """
+    Give every applicant of the form an interview event in a free (slot, panel) cell, as placed by the assignment
+    engine (see assignment_engine). Applicants who already have an event in this schedule keep it, unless its slot or
+    panel is no longer part of the schedule, in which case they are placed again. Slots, existing events and
+    applicants are loaded in one query each, the new events are inserted in one statement, and only the applicants
+    whose interview is new, moved or cancelled are emailed (queued in the outbox in the same transaction).
+    Slots that overlap an applicant's interviews in other schedules (found with one query) are skipped for them.
+    Returns the event ids of all scheduled applicants, and the conflicts: for every applicant with clashing slots,
+    {"user_id", "conflicting_slot_ids", "scheduled"}.
+    """
+    started_at = perf_counter()
+
+    slots_by_id: Dict[int, InterviewSlot] = {
+        slot.id: slot
+        for slot in db.query(InterviewSlot).filter(
+            InterviewSlot.id.in_(slot_ids),
+            InterviewSlot.interview_schedule_id == schedule_id,
+            InterviewSlot.club_id == club_id,
+        )
+    }
+
+    # events already in the schedule: their cells are taken, and their applicants are already scheduled. events in
+    # slots or panels that were dropped when the schedule was resubmitted are removed, and their applicants moved.
+    taken_cells = set()
+    event_id_by_user: Dict[str, int] = {}
+    stale_event_ids: List[int] = []
+    moved_user_ids = set()
+    current_panel_ids = set(panel_ids)
+    for event_id, panel_id, slot_id, user_id in db.query(
+        CalendarEvent.id,
+        CalendarEvent.panel_id,
+        CalendarEvent.interview_slot_id,
+        CalendarEvent.visible_to_user,
+    ).filter(
+        CalendarEvent.interview_schedule_id == schedule_id,
+        CalendarEvent.club_id == club_id,
+    ):
+        if slot_id not in slots_by_id or panel_id not in current_panel_ids:
+            stale_event_ids.append(event_id)
+            moved_user_ids.add(user_id)
+            continue
+        taken_cells.add((slot_id, panel_id))
+        event_id_by_user.setdefault(user_id, event_id)
+    # (an applicant with a second, still valid event keeps that one)
+    moved_user_ids -= event_id_by_user.keys()
+
+    if stale_event_ids:
+        freed_slot_ids = db.scalars(
+            delete(CalendarEvent)
+            .where(CalendarEvent.id.in_(stale_event_ids))
+            .returning(CalendarEvent.interview_slot_id)
+        ).all()
+        adjust_booked_counts(db, freed_slot_ids, -1)
+
+    # get all applicants of the form, in order of application
+    applicants = _query_applicants(db, form_id).order_by(Application.id).all()
+    unscheduled = [applicant for applicant in applicants if applicant.user_id not in event_id_by_user]
+
+    # interviews the unscheduled applicants already have for other forms on the days of this schedule
+    busy_by_user = get_busy_intervals(
+        db,
+        [applicant.user_id for applicant in unscheduled],
+        {slot.date for slot in slots_by_id.values()},
+        form_id,
+    )
 
-    # get all applications submitted for the form
-    applications = (
-        db.query(Application)
-        .filter(
-            Application.form_id == form_id,
+    # assign the applicants to slots with free panels, skipping slots that clash with their other interviews. the
+    # most endorsed go first (they get a slot if there are not enough), then each gets a free panel of its slot
+    free_panels: Dict[int, List[int]] = {
+        slot_id: [panel_id for panel_id in panel_ids if (slot_id, panel_id) not in taken_cells]
+        for slot_id in dict.fromkeys(slot_ids)
+        if slot_id in slots_by_id
+    }
+    slot_capacities = [
+        SlotCapacity(
+            slot_id=slot_id,
+            start=datetime.combine(slots_by_id[slot_id].date, slots_by_id[slot_id].start_time),
+            end=datetime.combine(slots_by_id[slot_id].date, slots_by_id[slot_id].end_time),
+            capacity=len(panels),
+        )
+        for slot_id, panels in free_panels.items()
+    ]
+    assigned_slots = assign(
+        [
+            Applicant(
+                key=applicant.user_id,
+                priority=applicant.endorser_count,
+                busy=busy_by_user.get(applicant.user_id),
+            )
+            for applicant in unscheduled
+        ],
+        slot_capacities,
+        engine,
+    )
+    assignments = [
+        (applicant, (assigned_slots[applicant.user_id], free_panels[assigned_slots[applicant.user_id]].pop(0)))
+        for applicant in unscheduled
+        if applicant.user_id in assigned_slots
+    ]
+
+    conflicts = []
+    for user_id, busy in busy_by_user.items():
+        conflicting_slot_ids = [slot.slot_id for slot in slot_capacities if busy.overlaps(slot.start, slot.end)]
+        if conflicting_slot_ids:
+            conflicts.append(
+                {
+                    "user_id": user_id,
+                    "conflicting_slot_ids": conflicting_slot_ids,
+                    "scheduled": user_id in assigned_slots,
+                }
+            )
+
+    for applicant, event_id in zip(
+        (applicant for applicant, _ in assignments),
+        create_interview_events(db, schedule_id, club_id, form_id, assignments, slots_by_id, moved_user_ids),
+    ):
+        event_id_by_user[applicant.user_id] = event_id
+
+    # applicants whose interview was dropped with its slot and who could not be placed again
+    for applicant in unscheduled:
+        if applicant.user_id in moved_user_ids and applicant.user_id not in assigned_slots:
+            enqueue_cancellation_email(db, applicant, club_id, form_id)
+
+    db.commit()
+
+    if len(unscheduled) > len(assignments):
+        logger.warning(
+            f"Schedule {schedule_id} has no free slot for {len(unscheduled) - len(assignments)} applicants"
         )
-        .all()
+    if conflicts:
+        logger.info(f"Schedule {schedule_id}: skipped clashing slots for {len(conflicts)} applicants")
+
+    elapsed_ms = (perf_counter() - started_at) * 1000
+    logger.info(
+        f"Allocated schedule {schedule_id}: {len(assignments)} new events for {len(applicants)} applicants "
+        f"in {elapsed_ms:.1f} ms"
+    )
+
+    event_ids = [
+        event_id_by_user[applicant.user_id]
+        for applicant in applicants
+        if applicant.user_id in event_id_by_user
+    ]
+    return event_ids, conflicts
+
+
+# applicants of a form who are still in the running (not rejected), with what scheduling and emailing them needs
+def _query_applicants(db: Session, form_id: int):
+    return db.query(
+        Application.user_id,
+        Application.endorser_count,
+        User.first_name,
+        User.last_name,
+        User.email,
+    ).join(User, User.uid == Application.user_id).filter(
+        Application.form_id == form_id,
+        Application.status != ApplicationStatus.rejected,
     )
 
-    # allocate calendar events to the applicants
-    cur_application: int = 0
-    event_ids: List[int] = []
-    for slot_id in slot_ids:
-        if cur_application >= len(applications):
-            break
-
-        interview_slot = (
-            db.query(InterviewSlot)
-            .filter(
-                InterviewSlot.id == slot_id,
-                InterviewSlot.interview_schedule_id == schedule_id,
-                InterviewSlot.club_id == club_id,
+
+# place applicants in free cells ({slot_id: [panel_id, ...]}, consumed as they are handed out), the highest priority
+# first, skipping slots that clash with their interviews for other forms. returns (applicant, (slot_id, panel_id))
+# assignments in the order of `applicants`.
+def _assign_free_cells(
+    db: Session,
+    form_id: int,
+    applicants: List[Any],
+    free_panels: Dict[int, List[int]],
+    slots_by_id: Dict[int, InterviewSlot],
+    engine: str,
+) -> List[Tuple[Any, Tuple[int, int]]]:
+    if not applicants or not free_panels:
+        return []
+
+    busy_by_user = get_busy_intervals(
+        db,
+        [applicant.user_id for applicant in applicants],
+        {slots_by_id[slot_id].date for slot_id in free_panels},
+        form_id,
+    )
+    assigned_slots = assign(
+        [
+            Applicant(
+                key=applicant.user_id,
+                priority=applicant.endorser_count,
+                busy=busy_by_user.get(applicant.user_id),
+            )
+            for applicant in applicants
+        ],
+        [
+            SlotCapacity(
+                slot_id=slot_id,
+                start=datetime.combine(slots_by_id[slot_id].date, slots_by_id[slot_id].start_time),
+                end=datetime.combine(slots_by_id[slot_id].date, slots_by_id[slot_id].end_time),
+                capacity=len(panels),
             )
-            .first()
+            for slot_id, panels in free_panels.items()
+        ],
+        engine,
+    )
+    return [
+        (applicant, (assigned_slots[applicant.user_id], free_panels[assigned_slots[applicant.user_id]].pop(0)))
+        for applicant in applicants
+        if applicant.user_id in assigned_slots
+    ]
+
+
+def enqueue_cancellation_email(db: Session, applicant: Any, club_id: str, form_id: int) -> None:
+    enqueue_email(
+        db,
+        [{"name": applicant.first_name + " " + applicant.last_name, "email": applicant.email}],
+        "Interview Cancelled",
+        f"Your interview for club {club_id} for form {form_id} has been cancelled, as its slot was removed "
+        f"from the schedule. The club will get in touch with you if a new slot opens up.",
+    )
+
+
+# add `delta` to the booked count of every slot in slot_ids (once per occurrence), one update per slot, in id order
+# so that concurrent callers lock the slots in the same order
+def adjust_booked_counts(db: Session, slot_ids: List[int], delta: int) -> None:
+    counts = Counter(slot_ids)
+    if not counts:
+        return
+
+    slots = InterviewSlot.__table__
+    db.execute(
+        update(slots)
+        .where(slots.c.id == bindparam("slot_id"))
+        .values(booked_count=slots.c.booked_count + bindparam("delta")),
+        [{"slot_id": slot_id, "delta": count * delta} for slot_id, count in sorted(counts.items())],
+    )
+
+
+# insert the events for (applicant, (slot_id, panel_id)) assignments in one statement, count them in their slots
+# (unless the caller already did), and queue the emails telling the applicants (those in rescheduled_user_ids had an
+# interview before). returns the event ids, in order.
+def create_interview_events(
+    db: Session,
+    schedule_id: int,
+    club_id: str,
+    form_id: int,
+    assignments: List[Tuple[Any, Tuple[int, int]]],
+    slots_by_id: Dict[int, InterviewSlot],
+    rescheduled_user_ids: Set[str] = frozenset(),
+    update_booked_counts: bool = True,
+) -> List[int]:
+    if not assignments:
+        return []
+
+    new_events = []
+    for applicant, (slot_id, panel_id) in assignments:
+        interview_slot = slots_by_id[slot_id]
+        new_events.append(
+            {
+                "interview_schedule_id": schedule_id,
+                "panel_id": panel_id,
+                "interview_slot_id": slot_id,
+                "visible_to_user": applicant.user_id,
+                "club_id": club_id,
+                "type": CalendarEventType.interview,
+                "title": f"Interview for {applicant.user_id} for club {club_id} for form {form_id} with panel {panel_id}",
+                "start_time": interview_slot.start_time,
+                "end_time": interview_slot.end_time,
+                "date": interview_slot.date,
+            }
+        )
+
+    new_event_ids = db.scalars(
+        insert(CalendarEvent).returning(CalendarEvent.id, sort_by_parameter_order=True),
+        new_events,
+    ).all()
+    if update_booked_counts:
+        adjust_booked_counts(db, [slot_id for _, (slot_id, _) in assignments], 1)
+
+    # alert the applicants, once the events are committed
+    for applicant, (slot_id, panel_id) in assignments:
+        interview_slot = slots_by_id[slot_id]
+        rescheduled = applicant.user_id in rescheduled_user_ids
+        enqueue_email(
+            db,
+            [{"name": applicant.first_name + " " + applicant.last_name, "email": applicant.email}],
+            "Interview Rescheduled" if rescheduled else "Interview Scheduled",
+            f"Your interview for club {club_id} for form {form_id} "
+            f"has been {'rescheduled' if rescheduled else 'scheduled'} with panel {panel_id} on {interview_slot.date} "
+            f"from {interview_slot.start_time} to {interview_slot.end_time}",
         )
 
-        for panel_id in panel_ids:
-            if cur_application >= len(applications):
-                break
+    return new_event_ids
 
-            application = applications[cur_application]
 
-            existing_calendar_event = (
-                db.query(CalendarEvent)
-                .filter(
-                    CalendarEvent.interview_schedule_id == schedule_id,
-                    CalendarEvent.panel_id == panel_id,
-                    CalendarEvent.interview_slot_id == slot_id,
-                    CalendarEvent.visible_to_user == application.user_id,
-                    CalendarEvent.club_id == club_id,
-                )
-                .first()
+# unscheduled applicants considered for every freed cell when backfilling, so that clashes with their other
+# interviews do not leave the cell empty while the work stays proportional to the cells freed
+BACKFILL_CANDIDATES_PER_CELL = 5
+
+
+def release_interviews(db: Session, form_id: int, user_id: str, engine: str = ASSIGNMENT_ENGINE) -> List[str]:
+    """
+    Free the interviews of an applicant for a form (e.g. when they withdraw their application), and give the freed
+    (slot, panel) cells to applicants of the form without an interview yet, the most endorsed first. Only the
+    applicants that get a freed cell are emailed. The work depends on the number of freed cells, not on the number
+    of applicants. Does not commit. Returns the user ids of the applicants that got an interview.
+    """
+    freed_events = db.execute(
+        delete(CalendarEvent)
+        .where(
+            CalendarEvent.visible_to_user == user_id,
+            CalendarEvent.interview_schedule_id.in_(
+                select(InterviewSchedule.id).where(InterviewSchedule.form_id == form_id)
+            ),
+        )
+        .returning(
+            CalendarEvent.interview_schedule_id,
+            CalendarEvent.club_id,
+            CalendarEvent.interview_slot_id,
+            CalendarEvent.panel_id,
+        )
+    ).all()
+
+    adjust_booked_counts(db, [slot_id for _, _, slot_id, _ in freed_events], -1)
+
+    freed_cells: Dict[Tuple[int, str], List[Tuple[int, int]]] = {}
+    for schedule_id, club_id, slot_id, panel_id in freed_events:
+        freed_cells.setdefault((schedule_id, club_id), []).append((slot_id, panel_id))
+
+    backfilled: List[str] = []
+    for (schedule_id, club_id), cells in freed_cells.items():
+        slots_by_id: Dict[int, InterviewSlot] = {
+            slot.id: slot
+            for slot in db.query(InterviewSlot).filter(InterviewSlot.id.in_({slot_id for slot_id, _ in cells}))
+        }
+
+        # the best applicants of the form without an interview in this schedule
+        candidates = _query_applicants(db, form_id).filter(
+            Application.user_id != user_id,
+            ~exists().where(
+                CalendarEvent.interview_schedule_id == schedule_id,
+                CalendarEvent.visible_to_user == Application.user_id,
+            ),
+        ).order_by(Application.endorser_count.desc(), Application.id).limit(
+            len(cells) * BACKFILL_CANDIDATES_PER_CELL
+        ).all()
+
+        free_panels: Dict[int, List[int]] = {}
+        for slot_id, panel_id in cells:
+            free_panels.setdefault(slot_id, []).append(panel_id)
+        assignments = _assign_free_cells(db, form_id, candidates, free_panels, slots_by_id, engine)
+        create_interview_events(db, schedule_id, club_id, form_id, assignments, slots_by_id)
+        backfilled += [candidate.user_id for candidate, _ in assignments]
+
+    if freed_events:
+        logger.info(
+            f"Released {len(freed_events)} interviews of {user_id} for form {form_id}, "
+            f"backfilled {len(backfilled)}"
+        )
+    return backfilled
+
+
+# interviews of the given users on the given dates (None for any date), except those for this form, in one query, as
+# an interval index per user (users without such interviews are left out)
+def get_busy_intervals(
+    db: Session, user_ids: List[str], dates: Set[date] | None, form_id: int
+) -> Dict[str, IntervalIndex]:
+    if not user_ids or dates is not None and not dates:
+        return {}
+
+    busy_intervals: Dict[str, List[Tuple[datetime, datetime]]] = {}
+    for user_id, event_date, start_time, end_time in db.query(
+        CalendarEvent.visible_to_user,
+        CalendarEvent.date,
+        CalendarEvent.start_time,
+        CalendarEvent.end_time,
+    ).outerjoin(
+        InterviewSchedule, InterviewSchedule.id == CalendarEvent.interview_schedule_id
+    ).filter(
+        CalendarEvent.visible_to_user.in_(user_ids),
+        InterviewSchedule.form_id.is_distinct_from(form_id),
+        CalendarEvent.date.between(min(dates), max(dates)) if dates is not None else true(),
+    ):
+        busy_intervals.setdefault(user_id, []).append(
+            (datetime.combine(event_date, start_time), datetime.combine(event_date, end_time))
+        )
+    return {user_id: IntervalIndex(intervals) for user_id, intervals in busy_intervals.items()}
+
+
+def preview_schedule(
+    form_id: int,
+    form_data: ScheduleInterviewFormResponseDatetime,
+    db: Session,
+    engine: str = ASSIGNMENT_ENGINE,
+) -> dict:
+    """
+    Dry run of scheduling the form's applicants with the given configuration: nothing is written and nobody is
+    emailed. Allocation runs the same way as allocate_calendar_events (priority by endorsements, clashes with other
+    interviews skipped), on the applicant ids only and as if the form had no schedule yet.
+    Returns the capacity, the applicants left without a slot and the number of interviews of every panel.
+    """
+    started_at = perf_counter()
+    num_panels = form_data.interviewSchedule.interviewPanelCount
+    slot_count = count_interview_slots(form_data)
+
+    applicants = db.query(Application.user_id, Application.endorser_count).filter(
+        Application.form_id == form_id,
+        Application.status != ApplicationStatus.rejected,
+    ).order_by(Application.id).all()
+    busy_by_user = get_busy_intervals(
+        db,
+        [applicant.user_id for applicant in applicants],
+        {date_schedule.date for date_schedule in form_data.interviewSchedule.dates},
+        form_id,
+    )
+
+    # only the first slots can be needed: each applicant clashes with at most (busy interval length / slot length + 1)
+    # slots, so with this many every applicant has room in enough slots to place all of them, if the whole
+    # schedule can. the rest of a long schedule is never generated.
+    slot_duration = timedelta(minutes=form_data.interviewSchedule.slotDurationMinutes)
+    clashing_slots_bound = sum(
+        (end - start) // slot_duration + 2
+        for busy in busy_by_user.values()
+        for start, end in busy
+    )
+    slots_needed = -(-len(applicants) // num_panels) + clashing_slots_bound
+    slots = [
+        SlotCapacity(slot_id=i, start=start_time, end=end_time, capacity=num_panels)
+        for i, (start_time, end_time, _) in enumerate(
+            islice(iter_interview_slots(form_data), slots_needed)
+        )
+    ]
+
+    assigned_slots = assign(
+        [
+            Applicant(
+                key=applicant.user_id,
+                priority=applicant.endorser_count,
+                busy=busy_by_user.get(applicant.user_id),
             )
+            for applicant in applicants
+        ],
+        slots,
+        engine,
+    )
 
-            if not existing_calendar_event:
-                calendar_event = CalendarEvent(
-                    interview_schedule_id=schedule_id,
-                    panel_id=panel_id,
-                    interview_slot_id=slot_id,
-                    visible_to_user=application.user_id,
-                    club_id=club_id,
-                    type=CalendarEventType.interview,
-                    title=f"Interview for {application.user_id} for club {club_id} for form {form_id} with panel {panel_id}",
-                    start_time=interview_slot.start_time,
-                    end_time=interview_slot.end_time,
-                    date=interview_slot.date,
-                )
-                db.add(calendar_event)
-                db.commit()
-                db.refresh(calendar_event)
-
-                # alert user that they have an interview scheduled
-                user_id = application.user_id
-                user = db.query(User).filter(User.uid == user_id).first()
-
-                inform_users(
-                    [user],
-                    "Interview Scheduled",
-                    f"Your interview for club {club_id} for form {form_id} "
-                    f"has been scheduled with panel {panel_id} on {interview_slot.date} "
-                    f"from {interview_slot.start_time} to {interview_slot.end_time}",
+    # panels are filled in order within a slot, like allocate_calendar_events does
+    interviews_in_slot = Counter(assigned_slots.values())
+    panel_load = [0] * num_panels
+    for interviews in interviews_in_slot.values():
+        for panel in range(interviews):
+            panel_load[panel] += 1
+
+    used_slots = [slots[slot_id] for slot_id in sorted(interviews_in_slot)]
+    return {
+        "slot_count": slot_count,
+        "panel_count": num_panels,
+        "capacity": slot_count * num_panels,
+        "applicant_count": len(applicants),
+        "assigned_count": len(assigned_slots),
+        "unassigned": [applicant.user_id for applicant in applicants if applicant.user_id not in assigned_slots],
+        "applicants_with_clashes": len(busy_by_user),
+        "panel_load": [{"panel": panel + 1, "interviews": load} for panel, load in enumerate(panel_load)],
+        "first_interview": used_slots[0].start.isoformat() if used_slots else None,
+        "last_interview": used_slots[-1].end.isoformat() if used_slots else None,
+        "elapsed_ms": round((perf_counter() - started_at) * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    # scheduling benchmark: materialize a two day schedule of 10 minute slots and allocate applicants to it, then
+    # submit it again. everything runs in a transaction that is rolled back, so it can be pointed at any database.
+    # usage (from backend/): python -m models.calendar.interviews_config [slot minutes] [panels] [applicants]
+    import sys
+
+    from models.clubs.clubs_model import Club
+    from models.club_recruitment.club_recruitment_model import Form
+    from utils.database_utils import engine
+    from utils.query_stats_utils import max_queries
+
+    slot_minutes = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    panels = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    applicant_count = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+
+    benchmark_schedule = ScheduleInterviewFormResponseStr(
+        interviewSchedule=InterviewScheduleStr(
+            slotDurationMinutes=slot_minutes,
+            interviewPanelCount=panels,
+            totalInterviewSlots=0,
+            dates=[
+                DateScheduleStr(
+                    date=day,
+                    timeRanges=[
+                        TimeRangeStr(startTime="09:00", endTime="13:00"),
+                        TimeRangeStr(startTime="14:00", endTime="20:00"),
+                    ],
                 )
+                for day in ("2025-04-20", "2025-04-21")
+            ],
+        )
+    )
+    benchmark_slots = calculate_interview_slots(
+        parse_schedule_interview_form_data(benchmark_schedule)
+    )
 
-            else:
-                calendar_event = existing_calendar_event
-
-            event_ids.append(calendar_event.id)
-            cur_application += 1
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        db = Session(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            db.add(Club(cid="benchmark-club", name="Benchmark Club", email="benchmark@example.com"))
+            db.flush()
+            form = Form(name="Benchmark Form", club_id="benchmark-club")
+            db.add(form)
+            db.flush()
+            db.execute(insert(User), [
+                {"uid": f"benchmark-{i}", "email": f"benchmark-{i}@example.com", "first_name": "Benchmark",
+                 "last_name": str(i), "roll_number": str(i)}
+                for i in range(applicant_count)
+            ])
+            db.execute(insert(Application), [
+                {"form_id": form.id, "user_id": f"benchmark-{i}"} for i in range(applicant_count)
+            ])
+            db.commit()
 
-    return event_ids
+            for run in ("first submission", "re-submission"):
+                with max_queries(20) as stats:
+                    started_at = perf_counter()
+                    schedule_id, slot_ids, panel_ids = create_schedule(
+                        club_id="benchmark-club",
+                        form_id=form.id,
+                        slots=benchmark_slots,
+                        slot_length=slot_minutes,
+                        num_panels=panels,
+                        db=db,
+                    )
+                    scheduled_at = perf_counter()
+                    event_ids, _ = allocate_calendar_events(
+                        schedule_id=schedule_id,
+                        slot_ids=slot_ids,
+                        panel_ids=panel_ids,
+                        db=db,
+                        club_id="benchmark-club",
+                        form_id=form.id,
+                    )
+                    allocated_at = perf_counter()
+                print(
+                    f"{run}: {len(slot_ids)} slots, {len(panel_ids)} panels in "
+                    f"{(scheduled_at - started_at) * 1000:.1f} ms, {len(event_ids)} of {applicant_count} applicants "
+                    f"allocated in {(allocated_at - scheduled_at) * 1000:.1f} ms "
+                    f"({stats.count} statements, {stats.writes} writes)"
+                )
+        finally:
+            db.close()
+            transaction.rollback()
@@ -41,7 +41,7 @@ class Question(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     form_id = Column(
-        Integer, ForeignKey("forms.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("forms.id", ondelete="CASCADE"), nullable=False, index=True
     )
     question_text = Column(Text, nullable=False)
     question_order = Column(Integer, nullable=True)
@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import exists
 from fastapi import HTTPException, status
@@ -6,8 +8,8 @@ from models.users.users_model import User
 from models.clubs.clubs_model import Club, club_subscribers
 
 
-async def fetch_info_about_all_clubs(db: Session):
-    clubs = db.query(Club).order_by(Club.name).all()
+async def fetch_info_about_all_clubs(db: AsyncSession):
+    clubs = (await db.execute(select(Club).order_by(Club.name))).scalars().all()
     return clubs
 
 
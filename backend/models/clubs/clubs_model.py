@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, String, JSON, ForeignKey, Table
+from sqlalchemy import Boolean, Column, String, JSON, ForeignKey, Index, Table
 from sqlalchemy.orm import relationship
 
 from utils.database_utils import Base
@@ -7,10 +7,12 @@ from utils.database_utils import Base
 club_members = Table(
     "club_members",
     Base.metadata,
-    Column("club_id", String, ForeignKey("clubs.cid", ondelete="CASCADE")),
-    Column("user_id", String, ForeignKey("users.uid", ondelete="CASCADE")),
+    Column("club_id", String, ForeignKey("clubs.cid", ondelete="CASCADE"), primary_key=True),
+    Column("user_id", String, ForeignKey("users.uid", ondelete="CASCADE"), primary_key=True),
     Column("role", String),
     Column("is_poc", Boolean, default=False),
+    # the primary key covers lookups by club, this one covers lookups by user (User.clubs)
+    Index("ix_club_members_user_id", "user_id"),
 )
 
 # association table for subscriptions: only user and club IDs
@@ -0,0 +1,239 @@
+import asyncio
+import datetime
+import logging
+import threading
+import time
+from os import getenv
+from typing import Dict, List
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models.applications.applications_model import ApplicationStatus
+from models.club_recruitment.club_recruitment_model import Form
+from models.notifications.notifications_model import OutboxEmail, OutboxStatus, PendingStatusNotification
+from models.users.users_model import User
+from utils.database_utils import SessionLocal
+from utils.mail_utils import build_mail_body, transport
+
+# how often the dispatcher looks for due emails.
+MAIL_OUTBOX_INTERVAL_SECONDS = float(getenv("MAIL_OUTBOX_INTERVAL_SECONDS", 5))
+# emails per bulk request (MailerSend accepts up to 500).
+MAIL_BULK_SIZE = int(getenv("MAIL_BULK_SIZE", 100))
+# bulk requests per minute, across the whole dispatcher of this worker.
+MAIL_RATE_LIMIT_PER_MINUTE = float(getenv("MAIL_RATE_LIMIT_PER_MINUTE", 10))
+# after this many failed attempts an email is marked as failed and no longer retried.
+MAIL_MAX_ATTEMPTS = int(getenv("MAIL_MAX_ATTEMPTS", 6))
+# retries wait MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), up to MAIL_RETRY_MAX_SECONDS.
+MAIL_RETRY_BASE_SECONDS = float(getenv("MAIL_RETRY_BASE_SECONDS", 30))
+MAIL_RETRY_MAX_SECONDS = float(getenv("MAIL_RETRY_MAX_SECONDS", 3600))
+# claimed emails are skipped by other dispatchers this long. if the worker dies while sending, they are retried after it.
+MAIL_CLAIM_SECONDS = float(getenv("MAIL_CLAIM_SECONDS", 300))
+# sent and failed emails are deleted from the outbox after this many days.
+MAIL_OUTBOX_RETENTION_DAYS = float(getenv("MAIL_OUTBOX_RETENTION_DAYS", 30))
+MAIL_OUTBOX_PURGE_INTERVAL_SECONDS = 60 * 60
+MAIL_OUTBOX_PURGE_BATCH_SIZE = 5000
+# application status changes are held this long and then mailed as one digest per user (0 sends on the next pass).
+STATUS_DIGEST_WINDOW_SECONDS = float(getenv("STATUS_DIGEST_WINDOW_SECONDS", 300))
+
+logger = logging.getLogger(__name__)
+
+# counters for the metrics endpoint
+outbox_stats = {"sent": 0, "failed": 0, "retried": 0, "bulk_requests": 0, "digests": 0, "digest_changes_dropped": 0,
+                "purged": 0, "last_pass_at": None, "last_purge_at": None, }
+
+
+class RateLimiter:
+    """
+    Spaces calls out so that at most `rate_per_minute` happen per minute, blocking the caller until it may proceed.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.interval = 60 / rate_per_minute if rate_per_minute > 0 else 0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+rate_limiter = RateLimiter(MAIL_RATE_LIMIT_PER_MINUTE)
+# monotonic time of the last outbox purge of this worker
+_last_purge_at: float | None = None
+
+
+# add an email to the outbox. it is sent by the dispatcher once the caller commits.
+def enqueue_email(db: Session, recipients: List[Dict[str, str]], subject: str, content: str) -> None:
+    db.add(OutboxEmail(recipients=recipients, subject=subject, content=content))
+
+
+def schedule_status_notifications(db: Session, form_id: int,
+        changes: List[tuple[str, ApplicationStatus, ApplicationStatus]]) -> None:
+    """
+    Hold (user_id, previous status, new status) changes of a form's applications for the digest window, in the
+    caller's transaction. A change to an application that already has a pending notification replaces it.
+    """
+    if not changes:
+        return
+
+    insert_stmt = pg_insert(PendingStatusNotification).values([
+        {"user_id": user_id, "form_id": form_id, "original_status": previous_status, "status": new_status,
+         "send_after": func.now() + datetime.timedelta(seconds=STATUS_DIGEST_WINDOW_SECONDS)}
+        for user_id, previous_status, new_status in {change[0]: change for change in changes}.values()])
+    db.execute(insert_stmt.on_conflict_do_update(index_elements=["user_id", "form_id"],
+        set_={"status": insert_stmt.excluded.status, "updated_at": func.now()}))
+
+
+def flush_status_digests(db: Session, batch_size: int = MAIL_BULK_SIZE) -> int:
+    """
+    Turn the pending status notifications of up to `batch_size` users whose window is over into one outbox email per
+    user, covering every form they have pending changes for. Returns the number of users handled.
+    """
+    due_users = (select(PendingStatusNotification.user_id)
+                 .where(PendingStatusNotification.send_after <= func.now())
+                 .group_by(PendingStatusNotification.user_id)
+                 .limit(batch_size))
+    rows = db.execute(select(PendingStatusNotification, User.first_name, User.last_name, User.email, Form.name,
+                             Form.club_id)
+                      .join(User, User.uid == PendingStatusNotification.user_id)
+                      .join(Form, Form.id == PendingStatusNotification.form_id)
+                      .where(PendingStatusNotification.user_id.in_(due_users))
+                      .order_by(PendingStatusNotification.user_id, PendingStatusNotification.form_id)
+                      .with_for_update(of=PendingStatusNotification, skip_locked=True)).all()
+    if not rows:
+        db.commit()
+        return 0
+
+    digests: Dict[str, dict] = {}
+    for pending, first_name, last_name, email, form_name, club_id in rows:
+        digest = digests.setdefault(pending.user_id, {"recipient": {"name": first_name + " " + last_name,
+                                                                    "email": email}, "lines": []})
+        # flipped back to where it started: nothing to tell
+        if pending.status == pending.original_status:
+            outbox_stats["digest_changes_dropped"] += 1
+            continue
+        digest["lines"].append(f"Your application status for form {form_name} (club {club_id}) has been "
+                               f"updated to {pending.status.value}.")
+
+    for digest in digests.values():
+        if digest["lines"]:
+            enqueue_email(db, [digest["recipient"]], "Application Status Update", "<br>".join(digest["lines"]))
+            outbox_stats["digests"] += 1
+
+    db.execute(delete(PendingStatusNotification).where(
+        tuple_(PendingStatusNotification.user_id, PendingStatusNotification.form_id).in_(
+            [(pending.user_id, pending.form_id) for pending, *_ in rows])))
+    db.commit()
+    return len(digests)
+
+
+def retry_delay(attempts: int) -> datetime.timedelta:
+    return datetime.timedelta(seconds=min(MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAIL_RETRY_MAX_SECONDS))
+
+
+def dispatch_outbox(db: Session, mail_transport=None, batch_size: int = MAIL_BULK_SIZE) -> int:
+    """
+    Send one bulk request with up to `batch_size` due emails. Returns the number of emails taken from the outbox.
+    The emails are claimed in a short transaction first (FOR UPDATE SKIP LOCKED, then pushing next_attempt_at out by
+    MAIL_CLAIM_SECONDS), so several workers can dispatch at the same time and no locks are held while sending.
+    """
+    mail_transport = mail_transport or transport
+    due_ids = (select(OutboxEmail.id)
+               .where(OutboxEmail.status == OutboxStatus.pending, OutboxEmail.next_attempt_at <= func.now())
+               .order_by(OutboxEmail.next_attempt_at, OutboxEmail.id)
+               .limit(batch_size)
+               .with_for_update(skip_locked=True))
+    emails = db.execute(update(OutboxEmail).where(OutboxEmail.id.in_(due_ids.scalar_subquery()))
+                        .values(attempts=OutboxEmail.attempts + 1,
+                                next_attempt_at=func.now() + datetime.timedelta(seconds=MAIL_CLAIM_SECONDS))
+                        .returning(OutboxEmail.id, OutboxEmail.recipients, OutboxEmail.subject, OutboxEmail.content,
+                                   OutboxEmail.attempts)
+                        .execution_options(synchronize_session=False)).all()
+    db.commit()
+    if not emails:
+        return 0
+
+    rate_limiter.wait()
+    try:
+        mail_transport.send_bulk([build_mail_body(email.recipients, email.subject, email.content) for email in emails])
+    except Exception as e:
+        logger.warning(f"Failed to send {len(emails)} emails: {e}")
+        error = str(e)[:1000]
+        failed_ids = [email.id for email in emails if email.attempts >= MAIL_MAX_ATTEMPTS]
+        if failed_ids:
+            db.execute(update(OutboxEmail).where(OutboxEmail.id.in_(failed_ids))
+                       .values(status=OutboxStatus.failed, last_error=error))
+            outbox_stats["failed"] += len(failed_ids)
+        # emails with the same number of attempts wait equally long for their next one
+        retry_ids: Dict[int, List[int]] = {}
+        for email in emails:
+            if email.attempts < MAIL_MAX_ATTEMPTS:
+                retry_ids.setdefault(email.attempts, []).append(email.id)
+        for attempts, ids in retry_ids.items():
+            db.execute(update(OutboxEmail).where(OutboxEmail.id.in_(ids))
+                       .values(next_attempt_at=func.now() + retry_delay(attempts), last_error=error))
+            outbox_stats["retried"] += len(ids)
+    else:
+        db.execute(update(OutboxEmail).where(OutboxEmail.id.in_([email.id for email in emails]))
+                   .values(status=OutboxStatus.sent, sent_at=func.now()))
+        outbox_stats["sent"] += len(emails)
+    finally:
+        outbox_stats["bulk_requests"] += 1
+
+    db.commit()
+    return len(emails)
+
+
+# delete sent and failed emails older than retention_days, batch_size rows per statement. returns the number deleted.
+def purge_outbox(db: Session, retention_days: float = MAIL_OUTBOX_RETENTION_DAYS,
+        batch_size: int = MAIL_OUTBOX_PURGE_BATCH_SIZE) -> int:
+    cutoff = func.now() - datetime.timedelta(days=retention_days)
+    removed = 0
+    while True:
+        old_ids = (select(OutboxEmail.id)
+                   .where(OutboxEmail.status.in_([OutboxStatus.sent, OutboxStatus.failed]),
+                          func.coalesce(OutboxEmail.sent_at, OutboxEmail.created_at) < cutoff)
+                   .limit(batch_size))
+        result = db.execute(delete(OutboxEmail).where(OutboxEmail.id.in_(old_ids)))
+        db.commit()
+
+        removed += result.rowcount
+        if result.rowcount < batch_size:
+            return removed
+
+
+# queue the status digests that are due, then send everything that is due, one bulk request at a time. once an hour,
+# also purge old emails.
+def _run_dispatch_pass() -> None:
+    global _last_purge_at
+    db = SessionLocal()
+    try:
+        while flush_status_digests(db) == MAIL_BULK_SIZE:
+            pass
+        while dispatch_outbox(db) == MAIL_BULK_SIZE:
+            pass
+
+        now = time.monotonic()
+        if _last_purge_at is None or now - _last_purge_at >= MAIL_OUTBOX_PURGE_INTERVAL_SECONDS:
+            _last_purge_at = now
+            outbox_stats["purged"] += purge_outbox(db)
+            outbox_stats["last_purge_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    finally:
+        db.close()
+    outbox_stats["last_pass_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+# background task sending the emails in the outbox.
+async def run_outbox_dispatcher(interval: float = MAIL_OUTBOX_INTERVAL_SECONDS) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(_run_dispatch_pass)
+        except Exception as e:
+            logger.error(f"Email outbox dispatch failed: {e}")
+        await asyncio.sleep(interval)
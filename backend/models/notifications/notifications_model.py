@@ -0,0 +1,53 @@
+import enum
+
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, JSON, String, Text
+from sqlalchemy.sql import func
+
+from models.applications.applications_model import ApplicationStatus
+from utils.database_utils import Base
+
+
+class OutboxStatus(enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    failed = "failed"
+
+
+# emails waiting to be sent (or already sent) by the outbox dispatcher, see notifications_config.
+class OutboxEmail(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # the dispatcher picks due pending emails, oldest first
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # list of {"name", "email"}
+    recipients = Column(JSON, nullable=False)
+    subject = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+
+    status = Column(Enum(OutboxStatus), nullable=False, default=OutboxStatus.pending)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+
+
+# application status changes waiting to be mailed as a digest, at most one per user and form (a newer change to the
+# same application replaces the older one). see schedule_status_notifications in notifications_config.
+class PendingStatusNotification(Base):
+    __tablename__ = "pending_status_notifications"
+
+    user_id = Column(String, ForeignKey("users.uid", ondelete="CASCADE"), primary_key=True)
+    form_id = Column(Integer, ForeignKey("forms.id", ondelete="CASCADE"), primary_key=True)
+
+    # status before the first change in this window, and the latest status. nothing is sent if they end up equal.
+    original_status = Column(Enum(ApplicationStatus), nullable=False)
+    status = Column(Enum(ApplicationStatus), nullable=False)
+
+    # end of the window, fixed by the first change so that repeated changes cannot postpone the mail forever
+    send_after = Column(DateTime, nullable=False, index=True)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 
 from utils.database_utils import Base
@@ -6,6 +6,11 @@ from utils.database_utils import Base
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # covers session validation (id + expiry check) and the expired session reaper.
+        Index("ix_sessions_id_expires_at", "id", "expires_at"),
+        Index("ix_sessions_user_uid", "user_uid"),
+    )
 
     id = Column(String, primary_key=True)  # session ID
     user_uid = Column(String, ForeignKey("users.uid"), nullable=False)
@@ -13,3 +18,12 @@ class Session(Base):
     expires_at = Column(DateTime, nullable=False)
     user_agent = Column(String, nullable=True)
     ip_address = Column(String, nullable=True)
+
+
+# sessions that were logged out before they expired. used by the signed-claims fast path (see session_utils),
+# which has no other way to find out about a logout.
+class SessionRevocation(Base):
+    __tablename__ = "session_revocations"
+
+    handle = Column(String, primary_key=True)  # session handle, never the session ID itself
+    expires_at = Column(DateTime, nullable=False, index=True)
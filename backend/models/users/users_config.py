@@ -5,26 +5,28 @@ courtesy of https://github.com/bhavberi
 """
 
 from os import getenv
-from typing import List
+from typing import List, NamedTuple
 
 from cas import CASClientV3
-from fastapi import HTTPException, Response
+from fastapi import Depends, HTTPException, Response
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from starlette.responses import RedirectResponse
 
 from models.users.users_model import User
-from models.clubs.clubs_model import Club
-from utils.mail_utils import send_email
-from utils.session_utils import create_session, SESSION_COOKIE_NAME, invalidate_session
+from models.clubs.clubs_model import Club, club_members
+from models.notifications.notifications_config import enqueue_email
+from utils.session_utils import (create_session, get_read_only_user, SESSION_COOKIE_NAME, SESSION_CLAIMS_COOKIE_NAME,
+                                 invalidate_session, )
 
 
-def inform_users(subscribers: List, subject: str, content: str) -> None:
-    recipients = [
-        {"name": user.first_name + " " + user.last_name, "email": user.email}
-        for user in subscribers
-    ]
+# queue one email per user in the notification outbox (and commit it). the dispatcher sends them in bulk.
+def inform_users(subscribers: List, subject: str, content: str, db: Session) -> None:
+    for user in subscribers:
+        enqueue_email(db, [{"name": user.first_name + " " + user.last_name, "email": user.email}], subject, content)
 
-    send_email(recipients, subject, content)
+    db.commit()
 
 
 def get_batch(roll):
@@ -82,7 +84,7 @@ async def user_login_cas(
                 db.refresh(db_user)
 
             # create session token and set cookie
-            encrypted_session_id = create_session(
+            encrypted_session_id, session_claims = create_session(
                 user_uid=uid, user_agent=user_agent, ip_address=ip_address, db=db
             )
             response = RedirectResponse(url=f"{getenv('FRONTEND_URL')}/profile")
@@ -93,6 +95,14 @@ async def user_login_cas(
                 secure=True,
                 samesite="lax",  # protection against CSRF
             )
+            if session_claims:
+                response.set_cookie(
+                    key=SESSION_CLAIMS_COOKIE_NAME,
+                    value=session_claims,
+                    httponly=True,
+                    secure=True,
+                    samesite="lax",
+                )
     return response
 
 
@@ -100,6 +110,7 @@ async def user_login_cas(
 async def user_logout(response: Response, encrypted_session_id: str, db: Session):
     invalidate_session(encrypted_session_id, db)
     response.delete_cookie(key=SESSION_COOKIE_NAME)
+    response.delete_cookie(key=SESSION_CLAIMS_COOKIE_NAME)
     return {"message": "Logged out successfully"}
 
 
@@ -112,23 +123,73 @@ async def get_clubs_by_user(user_id: str, db: Session):
 
 
 def is_member_of_club(user_id: str, club_id: str, db: Session) -> bool:
-    club = db.query(Club).filter(Club.cid == club_id).first()
-    if not club:
+    row = db.execute(select(Club.cid, exists().where(club_members.c.club_id == club_id,
+                                                     club_members.c.user_id == user_id))
+                     .where(Club.cid == club_id)).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Club not found")
 
-    return any(member.uid == user_id for member in club.members)
+    return row[1]
 
 
 def is_admin_of_club(user_id: str, club_id: str, db: Session) -> bool:
     """
     The club admin is defined as the user whose email matches the club's email address.
     """
-    club = db.query(Club).filter(Club.cid == club_id).first()
-    if not club:
+    row = db.execute(select(Club.email, User.uid, User.email).select_from(Club)
+                     .outerjoin(User, User.uid == user_id).where(Club.cid == club_id)).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Club not found")
 
-    user = db.query(User).filter(User.uid == user_id).first()
-    if not user:
+    club_email, uid, user_email = row
+    if uid is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return user.email == club.email  # type: ignore
+    return user_email == club_email
+
+
+class ClubRole(NamedTuple):
+    is_member: bool
+    is_admin: bool
+
+    @property
+    def is_member_or_admin(self) -> bool:
+        return self.is_member or self.is_admin
+
+
+# membership and admin status of a user in a club, in one query. raises a 404 if the club does not exist.
+def get_club_role(user_id: str, club_id: str, db: Session) -> ClubRole:
+    row = db.execute(select(Club.email, User.email, exists().where(club_members.c.club_id == club_id,
+                                                                   club_members.c.user_id == user_id))
+                     .select_from(Club).outerjoin(User, User.uid == user_id).where(Club.cid == club_id)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Club not found")
+
+    club_email, user_email, is_member = row
+    return ClubRole(is_member=is_member, is_admin=user_email is not None and user_email == club_email)
+
+
+class AuthzContext:
+    """
+    Request scoped authorization for the current user: their role in each club is looked up once per request and
+    remembered, however many checks the handler runs. Use it through the get_authz_context dependency.
+    """
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self._roles: dict[str, ClubRole] = {}
+
+    def role(self, club_id: str, db: Session) -> ClubRole:
+        if club_id not in self._roles:
+            self._roles[club_id] = get_club_role(self.user_id, club_id, db)
+        return self._roles[club_id]
+
+    async def role_async(self, club_id: str, db: AsyncSession) -> ClubRole:
+        if club_id not in self._roles:
+            self._roles[club_id] = await db.run_sync(lambda session: get_club_role(self.user_id, club_id, session))
+        return self._roles[club_id]
+
+
+# dependency giving the authorization context of the current request (fastapi caches it for the request).
+async def get_authz_context(user_data: dict = Depends(get_read_only_user)) -> AuthzContext:
+    return AuthzContext(user_data["uid"])
@@ -1,19 +1,21 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Body, Path
+from fastapi import APIRouter, Depends, HTTPException, Body, Header, Path, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from models.applications.applications_config import (get_application_autofill_info, process_submitted_application,
                                                      get_application_status, update_application_status,
                                                      endorse_application, withdraw_endorsement, delete_application,
                                                      get_application_details, get_user_applications,
-                                                     get_form_applications, has_user_applied, )
-from models.users.users_config import inform_users
-from models.users.users_model import User
+                                                     get_form_applications, get_endorsed_applications,
+                                                     has_user_applied, bulk_update_application_status, )
+from models.users.users_config import AuthzContext, get_authz_context
+from models.applications.applications_model import ApplicationStatus
 from schemas.applications.applications import (ApplicationOut, ApplicationStatusUpdate, UserApplicationOut,
-                                               FormApplicationOut, )
-from utils.database_utils import get_db
-from utils.session_utils import get_current_user
+                                               FormApplicationOut, BulkStatusUpdate, BulkStatusOutcome, )
+from utils.database_utils import get_async_db, get_async_read_db, get_db
+from utils.session_utils import get_current_user, get_read_only_user
 
 router = APIRouter(tags=["Applications"],
     responses={404: {"description": "Not found"}, 401: {"description": "Not authenticated"},
@@ -38,34 +40,54 @@ async def get_application_autofill_info_endpoint(user_data: dict = Depends(get_c
 async def process_submitted_application_endpoint(form_data: dict = Body(..., example={"form_id": 123,
     "responses": [{"question_id": 1, "answer_text": "My response to question 1"},
         {"question_id": 2, "answer_text": "My response to question 2"}, ]},
-    description="Application form data containing form ID and responses to questions", ), db: Session = Depends(get_db),
+    description="Application form data containing form ID and responses to questions", ),
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key",
+            description="Client generated key for this submission. Retries with the same key are safe."),
+        db: AsyncSession = Depends(get_async_db),
         user_info: dict = Depends(get_current_user), ):
     """
     Submit a new application for a recruitment form.
 
     - **form_data**: Contains the form ID and responses to questions
+    - **Idempotency-Key** header: Optional, resending a submission with the same key returns the original application
+      instead of an error
     - Authentication required: User must be logged in
     - Returns the created application with its ID and status
     """
-    return await process_submitted_application(form_data, db, user_info)
+    return await process_submitted_application(form_data, db, user_info, idempotency_key)
 
 
 @router.get("/form/{form_id}", response_model=List[FormApplicationOut], summary="Get Form Applications",
-    description="Retrieves all applications for a specific form. Requires appropriate permissions.",
+    description="Retrieves the applications for a specific form, optionally paginated. Requires appropriate permissions.",
     response_description="List of applications for the specified form", )
-async def get_form_applications_endpoint(
+async def get_form_applications_endpoint(response: Response,
         form_id: int = Path(..., description="The ID of the form to retrieve applications for"),
-        db: Session = Depends(get_db), user_data: dict = Depends(get_current_user), ):
+        status: Optional[ApplicationStatus] = Query(None, description="Only return applications with this status"),
+        sort: Literal["submitted_at", "endorsements"] = Query("submitted_at",
+            description="Order by submission time (oldest first) or by endorsement count (most endorsed first)"),
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+        limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (all applications if not set)"),
+        db: AsyncSession = Depends(get_async_db), user_data: dict = Depends(get_read_only_user),
+        authz: AuthzContext = Depends(get_authz_context), ):
     """
-    Get all applications submitted for a specific form.
+    Get the applications submitted for a specific form.
 
     - Authentication required: User must be logged in
     - Authorization required: User must be admin or member of the club that owns the form
-    - Returns a list of applications with user information and responses
+    - **status**: Optional status filter
+    - **sort**: `submitted_at` (default) or `endorsements`
+    - **limit**/**cursor**: Keyset pagination. If there are more applications, the cursor for the next page is
+      returned in the `X-Next-Cursor` response header
+    - Returns a list of applications with user information
     """
     try:
-        applications = await get_form_applications(form_id, db, user_data)
+        applications, next_cursor = await get_form_applications(form_id, db, user_data, status, sort, cursor, limit,
+                                                                    authz)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return applications
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -73,7 +95,8 @@ async def get_form_applications_endpoint(
 @router.get("/user", response_model=List[UserApplicationOut], summary="Get User Applications",
     description="Retrieves all applications submitted by the current user.",
     response_description="List of applications submitted by the current user", )
-async def get_user_applications_endpoint(db: Session = Depends(get_db), user_data: dict = Depends(get_current_user), ):
+async def get_user_applications_endpoint(db: AsyncSession = Depends(get_async_read_db),
+        user_data: dict = Depends(get_read_only_user), ):
     """
     Get all applications submitted by the currently logged-in user.
 
@@ -89,12 +112,28 @@ async def get_user_applications_endpoint(db: Session = Depends(get_db), user_dat
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get("/endorsed", response_model=List[FormApplicationOut], summary="Get Endorsed Applications",
+    description="Retrieves the applications the current user has endorsed.",
+    response_description="List of applications endorsed by the current user", )
+async def get_endorsed_applications_endpoint(
+        form_id: Optional[int] = Query(None, description="Only return applications to this form"),
+        db: AsyncSession = Depends(get_async_read_db), user_data: dict = Depends(get_read_only_user), ):
+    """
+    Get the applications endorsed by the currently authenticated user.
+
+    - Authentication required: User must be logged in
+    - **form_id**: Optional, limits the result to one form
+    - Returns the endorsed applications, most recently submitted first
+    """
+    return await get_endorsed_applications(db, user_data, form_id)
+
+
 @router.get("/{application_id}/status", summary="Get Application Status",
     description="Retrieves the current status of a specific application.",
     response_description="Current status of the application", )
 async def get_application_status_endpoint(
         application_id: int = Path(..., description="The ID of the application to check status for"),
-        db: Session = Depends(get_db), user_data: dict = Depends(get_current_user), ):
+        db: Session = Depends(get_db), user_data: dict = Depends(get_read_only_user), ):
     """
     Check the current status of a specific application.
 
@@ -110,7 +149,8 @@ async def get_application_status_endpoint(
     response_description="Detailed application information including responses", )
 async def get_application_details_endpoint(
         application_id: int = Path(..., description="The ID of the application to retrieve"),
-        db: Session = Depends(get_db), user_data: dict = Depends(get_current_user), ):
+        db: Session = Depends(get_db), user_data: dict = Depends(get_read_only_user),
+        authz: AuthzContext = Depends(get_authz_context), ):
     """
     Get comprehensive details about a specific application.
 
@@ -118,7 +158,7 @@ async def get_application_details_endpoint(
     - Authorization required: Must be the applicant or a club member/admin
     - Returns detailed application information including form responses
     """
-    return await get_application_details(application_id, db, user_data)
+    return await get_application_details(application_id, db, user_data, authz)
 
 
 @router.put("/{application_id}/status", response_model=ApplicationOut, summary="Update Application Status",
@@ -127,25 +167,45 @@ async def get_application_details_endpoint(
 async def update_application_status_endpoint(
         application_id: int = Path(..., description="The ID of the application to update"),
         status_update: ApplicationStatusUpdate = Body(..., description="New status details"),
-        db: Session = Depends(get_db), user_data = Depends(get_current_user)):
+        db: Session = Depends(get_db), user_data = Depends(get_current_user),
+        authz: AuthzContext = Depends(get_authz_context)):
     """
     Update the status of an application.
 
     - Authentication required: User must be logged in
     - Authorization required: Must be a club admin for the associated form
-    - Email notification will be sent to the applicant
+    - The applicant is emailed after a few minutes, together with their other status changes in that time
     - Returns the updated application with new status
     """
-    updated_application, form = await update_application_status(db, application_id, status_update, user_data)
+    updated_application, _ = await update_application_status(db, application_id, status_update, user_data, authz)
 
-    user_id = updated_application.user_id
-    user = db.query(User).filter(User.uid == user_id).first()
-    subscribers = [user]
+    return updated_application
 
-    inform_users(subscribers, "Application Status Update",
-        f"Your application status for form {form.name} (club {form.club_id}) has been " + f"updated to {updated_application.status}.", )
 
-    return updated_application
+@router.post("/form/{form_id}/status", response_model=List[BulkStatusOutcome], summary="Bulk Update Application Status",
+    description="Updates the status of many applications of a form at once. Only club admins can do this.",
+    response_description="The outcome for every application", )
+async def bulk_update_application_status_endpoint(
+        form_id: int = Path(..., description="The ID of the form whose applications are updated"),
+        bulk_update: BulkStatusUpdate = Body(..., example={
+            "updates": [{"application_id": 1, "status": "accepted"}, {"application_id": 2, "status": "accepted"}],
+            "reject_remaining": True}, description="Status changes, and whether to reject all other ongoing applications"),
+        db: Session = Depends(get_db), user_data: dict = Depends(get_current_user),
+        authz: AuthzContext = Depends(get_authz_context), ):
+    """
+    Update the status of several applications of a form in one go.
+
+    - **updates**: List of application IDs with their new status
+    - **reject_remaining**: If true, every other application of the form that is still ongoing is rejected
+    - Authentication required: User must be logged in
+    - Authorization required: Must be a club admin for the form
+    - All changes are applied together, or not at all
+    - The affected applicants are emailed after a few minutes, one digest per applicant
+    - Returns one outcome per application: `updated`, `unchanged` (already had that status) or `not_found`
+    """
+    outcomes = await bulk_update_application_status(db, form_id, bulk_update, user_data, authz)
+
+    return outcomes
 
 
 @router.put("/{application_id}/endorse", summary="Endorse Application",
@@ -153,7 +213,8 @@ async def update_application_status_endpoint(
     response_description="Updated application with endorsement information", )
 async def endorse_application_endpoint(
         application_id: int = Path(..., description="The ID of the application to endorse"),
-        db: Session = Depends(get_db), user_data: dict = Depends(get_current_user), ):
+        db: Session = Depends(get_db), user_data: dict = Depends(get_current_user),
+        authz: AuthzContext = Depends(get_authz_context), ):
     """
     Endorse a specific application.
 
@@ -162,7 +223,7 @@ async def endorse_application_endpoint(
     - A user can only endorse an application once
     - Returns the updated application with endorsement information
     """
-    return await endorse_application(application_id, db, user_data)
+    return await endorse_application(application_id, db, user_data, authz)
 
 
 @router.put("/{application_id}/withdraw-endorsement", summary="Withdraw Endorsement",
@@ -192,6 +253,7 @@ async def delete_application_endpoint(
     - Authentication required: User must be logged in
     - Authorization required: Must be the applicant only
     - This action is irreversible
+    - A scheduled interview for the application is cancelled and its slot given to an applicant still waiting for one
     - Returns confirmation of successful deletion
     """
     return await delete_application(application_id, db, user_data)
@@ -203,7 +265,7 @@ async def delete_application_endpoint(
 async def has_user_applied_endpoint(
         form_id: int = Path(..., description="The ID of the form to check"),
         db: Session = Depends(get_db),
-        user_data: dict = Depends(get_current_user)):
+        user_data: dict = Depends(get_read_only_user)):
     """
     Check if the current user has already applied to a specific form.
 
@@ -1,12 +1,11 @@
-from fastapi import APIRouter, status, Cookie, Depends
+from fastapi import APIRouter, status, Depends
 from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from models.calendar.calendar_events_model import CalendarEvent
 from models.clubs.clubs_model import Club, club_members
-from routers.users_router import get_current_user
-from utils.database_utils import get_db
-from utils.session_utils import SESSION_COOKIE_NAME
+from routers.users_router import get_read_only_user
+from utils.database_utils import get_read_db
 
 router = APIRouter(tags=["Calendar"])
 
@@ -14,11 +13,9 @@ router = APIRouter(tags=["Calendar"])
 @router.get("/events", status_code=status.HTTP_200_OK, summary="Get Calendar Events",
             description="Retrieves calendar events that are visible to the current user based on their permissions and club memberships.",
             response_description="List of calendar events visible to the user", )
-async def schedule_interviews(encrypted_session_id: str = Cookie(None, alias=SESSION_COOKIE_NAME),
-                              db: Session = Depends(get_db), ):
+async def schedule_interviews(cur_user: dict = Depends(get_read_only_user), db: Session = Depends(get_read_db), ):
     # TODO: RBAC?
     # must be the club account
-    cur_user = await get_current_user(encrypted_session_id, db)
 
     # get clubs the user is a member of
     club_ids = list(
@@ -1,13 +1,14 @@
 from typing import List
 
 from fastapi import APIRouter, status, Depends, Path
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from models.clubs.clubs_config import (fetch_club_by_id, fetch_info_about_all_clubs, is_subscribed, subscribe,
                                        unsubscribe, )
 from schemas.clubs.clubs import ClubOut
-from utils.database_utils import get_db
-from utils.session_utils import get_current_user
+from utils.database_utils import get_async_read_db, get_db
+from utils.session_utils import get_current_user, get_read_only_user
 
 router = APIRouter(tags=["Clubs"],
     responses={404: {"description": "Club not found"}, 401: {"description": "Not authenticated"},
@@ -17,7 +18,7 @@ router = APIRouter(tags=["Clubs"],
 @router.get("/all_clubs", response_model=List[ClubOut], status_code=status.HTTP_200_OK, summary="Get All Clubs",
     description="Retrieves information about all clubs in the system.",
     response_description="List of all clubs with their details", )
-async def get_all_club_information(db: Session = Depends(get_db)):
+async def get_all_club_information(db: AsyncSession = Depends(get_async_read_db)):
     """
     Retrieve information about all clubs in the system.
 
@@ -51,7 +52,7 @@ async def get_club_by_id(
     responses={404: {"description": "Club not found"}})
 def get_subscription_status(
         cid: str = Path(..., description="The unique identifier of the club to check subscription status for",
-            example="cs-club"), current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+            example="cs-club"), current_user: dict = Depends(get_read_only_user), db: Session = Depends(get_db)):
     """
     Check if the current user is subscribed to a specific club.
 
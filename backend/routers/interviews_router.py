@@ -6,7 +6,6 @@ from fastapi import (
     status,
     Body,
     HTTPException,
-    Cookie,
     Depends,
 )
 from sqlalchemy.orm import Session
@@ -19,10 +18,19 @@ from models.calendar.interviews_config import (
     calculate_interview_slots,
     create_schedule,
     allocate_calendar_events,
+    preview_schedule,
 )
-from routers.users_router import get_current_user
-from utils.database_utils import get_db
-from utils.session_utils import SESSION_COOKIE_NAME
+from models.calendar.booking_config import (
+    BookingRequest,
+    availability_cache,
+    book_interview,
+    cancel_booking,
+    get_availability,
+    get_published_schedule,
+    publish_schedule,
+)
+from routers.users_router import get_current_user, get_read_only_user
+from utils.database_utils import get_db, get_read_db
 
 router = APIRouter(
     tags=["Interviews"],
@@ -51,7 +59,7 @@ router = APIRouter(
 )
 async def schedule_interviews(
     form_id: int,
-    encrypted_session_id: str = Cookie(None, alias=SESSION_COOKIE_NAME),
+    cur_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
     form_data: ScheduleInterviewFormResponseStr = Body(
         ...,
@@ -87,7 +95,9 @@ async def schedule_interviews(
 
     - Authentication required: User must be logged in
     - Authorization required: User must be an admin of the club associated with the form
-    - Returns confirmation of successful scheduling and creation of calendar events
+    - Slots that clash with an applicant's interviews for other clubs are skipped for that applicant
+    - Returns confirmation of successful scheduling and creation of calendar events, and the applicants whose
+      slots clashed with other interviews (with whether they could still be scheduled)
     """
     print("Received interview schedule data:")
     print(json.dumps(form_data.model_dump(), indent=2))
@@ -103,7 +113,6 @@ async def schedule_interviews(
 
     # RBAC
     # must be the club account
-    cur_user = await get_current_user(encrypted_session_id, db)
     if cur_user["uid"] != recruitment_form.club_id:
         raise HTTPException(
             status_code=403,
@@ -130,7 +139,7 @@ async def schedule_interviews(
     except ValueError as e:
         raise HTTPException(
             status_code=400,
-            detail="Invalid time slots: overlapping intervals detected. Please enter correct time slots.",
+            detail=f"Invalid time slots: {e}. Please enter correct time slots.",
         )
 
     # Calculate interview slots based on the provided configuration
@@ -191,7 +200,7 @@ async def schedule_interviews(
     #     print(application.id)
 
     # allocate applicants to slots
-    event_ids = allocate_calendar_events(
+    event_ids, conflicts = allocate_calendar_events(
         schedule_id=schedule_id,
         slot_ids=slot_ids,
         panel_ids=panel_ids,
@@ -201,6 +210,8 @@ async def schedule_interviews(
     )
     print("Allocated calendar events successfully")
     print(event_ids)
+    # if the schedule is published, applicants see its new slots and seats right away
+    availability_cache.pop(schedule_id)
 
     return {
         "success": True,
@@ -210,5 +221,240 @@ async def schedule_interviews(
             "slot_count": len(slot_ids),
             "panel_count": len(panel_ids),
             "event_count": len(event_ids),
+            "conflicts": conflicts,
+        },
+    }
+
+
+@router.post(
+    "/schedule_interviews/{form_id}/preview",
+    status_code=status.HTTP_200_OK,
+    summary="Preview Interview Schedule",
+    description="Computes how an interview schedule would allocate the applicants of a recruitment form, without saving anything.",
+    response_description="Capacity, unassigned applicants and per-panel load of the schedule",
+    responses={
+        400: {
+            "description": "Invalid time slots: Overlapping intervals or other validation errors"
+        },
+        403: {
+            "description": "User does not have permission to schedule interviews for this club"
+        },
+    },
+)
+async def preview_schedule_interviews(
+    form_id: int,
+    cur_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    form_data: ScheduleInterviewFormResponseStr = Body(
+        ...,
+        description="Interview schedule configuration, as for scheduling interviews",
+    ),
+):
+    """
+    Preview an interview schedule for a recruitment form (a dry run of scheduling interviews).
+
+    Takes the same configuration as scheduling interviews and allocates the current applicants the same way, but
+    writes nothing and sends no emails, so slot length and panel count can be tried out quickly.
+
+    - Authentication required: User must be logged in
+    - Authorization required: User must be an admin of the club associated with the form
+    - Returns the number of slots and the capacity, the applicants that would not get a slot, the interviews each
+      panel would take, and the first and last interview times
+    """
+    recruitment_form = db.query(Form).filter(Form.id == form_id).first()
+    if not recruitment_form:
+        raise HTTPException(
+            status_code=404,
+            detail="Form not found",
+        )
+
+    # RBAC
+    # must be the club account
+    if cur_user["uid"] != recruitment_form.club_id:
+        raise HTTPException(
+            status_code=403,
+            detail="You are not allowed to schedule interviews for this club.",
+        )
+
+    try:
+        form_data_parsed: ScheduleInterviewFormResponseDatetime = (
+            parse_schedule_interview_form_data(form_data)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid time slots: {e}. Please enter correct time slots.",
+        )
+
+    return preview_schedule(form_id=form_id, form_data=form_data_parsed, db=db)
+
+
+@router.post(
+    "/schedule_interviews/{form_id}/publish",
+    status_code=status.HTTP_200_OK,
+    summary="Publish Interview Schedule",
+    description="Creates the interview schedule of a recruitment form and opens it for applicants to book their own slots.",
+    response_description="The published schedule",
+    responses={
+        400: {
+            "description": "Invalid time slots: Overlapping intervals or other validation errors"
+        },
+        403: {
+            "description": "User does not have permission to schedule interviews for this club"
+        },
+    },
+)
+async def publish_schedule_interviews(
+    form_id: int,
+    cur_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    form_data: ScheduleInterviewFormResponseStr = Body(
+        ...,
+        description="Interview schedule configuration, as for scheduling interviews",
+    ),
+):
+    """
+    Publish an interview schedule for a recruitment form, letting applicants book their own slots instead of being
+    allocated one.
+
+    - Authentication required: User must be logged in
+    - Authorization required: User must be an admin of the club associated with the form
+    - Interviews already scheduled are kept, and count against the seats of their slots
+    - Returns the schedule id, its number of slots and panels, and when it was published
+    """
+    recruitment_form = db.query(Form).filter(Form.id == form_id).first()
+    if not recruitment_form:
+        raise HTTPException(
+            status_code=404,
+            detail="Form not found",
+        )
+
+    # RBAC
+    # must be the club account
+    if cur_user["uid"] != recruitment_form.club_id:
+        raise HTTPException(
+            status_code=403,
+            detail="You are not allowed to schedule interviews for this club.",
+        )
+
+    # deadline check
+    deadline = recruitment_form.deadline
+    if deadline.tzinfo is None:
+        deadline = deadline.replace(tzinfo=timezone.utc)
+    if datetime.now(timezone.utc) < deadline:
+        raise HTTPException(
+            status_code=400,
+            detail="Form is still active. Cannot schedule interviews.",
+        )
+
+    try:
+        form_data_parsed: ScheduleInterviewFormResponseDatetime = (
+            parse_schedule_interview_form_data(form_data)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid time slots: {e}. Please enter correct time slots.",
+        )
+
+    schedule_id, slot_ids, panel_ids = create_schedule(
+        club_id=cur_user["uid"],
+        form_id=form_id,
+        slots=calculate_interview_slots(form_data_parsed),
+        slot_length=form_data_parsed.interviewSchedule.slotDurationMinutes,
+        num_panels=form_data_parsed.interviewSchedule.interviewPanelCount,
+        db=db,
+    )
+    published_at = publish_schedule(db, schedule_id)
+
+    return {
+        "success": True,
+        "message": "Interview schedule published",
+        "details": {
+            "schedule_id": schedule_id,
+            "slot_count": len(slot_ids),
+            "panel_count": len(panel_ids),
+            "published_at": published_at,
         },
     }
+
+
+@router.get(
+    "/{form_id}/slots",
+    status_code=status.HTTP_200_OK,
+    summary="Get Bookable Interview Slots",
+    description="Lists the slots of the published interview schedule of a form with the seats left in each.",
+    response_description="The slots of the schedule, in chronological order",
+    responses={404: {"description": "No schedule has been published for this form"}},
+)
+async def get_interview_slots(
+    form_id: int,
+    cur_user: dict = Depends(get_read_only_user),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Get the slots applicants can book for a form.
+
+    - Authentication required: User must be logged in
+    - Seats left may be a couple of seconds out of date; booking always checks them again
+    """
+    schedule = get_published_schedule(form_id, db)
+    return {
+        "schedule_id": schedule.id,
+        "slot_length": schedule.slot_length,
+        "slots": get_availability(schedule, db),
+    }
+
+
+@router.post(
+    "/{form_id}/book",
+    status_code=status.HTTP_201_CREATED,
+    summary="Book Interview Slot",
+    description="Books an interview slot in the published schedule of a form for the current user.",
+    response_description="The booked interview",
+    responses={
+        403: {"description": "User does not have an active application for this form"},
+        404: {"description": "No schedule has been published for this form, or the slot does not exist"},
+        409: {"description": "The slot is full or clashes with another interview, or the user already has one"},
+    },
+)
+async def book_interview_slot(
+    form_id: int,
+    booking: BookingRequest = Body(
+        BookingRequest(),
+        description="The slot to book. Leave slot_id out to get the earliest slot with a seat left.",
+    ),
+    cur_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Book an interview for the current user.
+
+    - Authentication required: User must be logged in
+    - Authorization required: User must have applied to the form, and not been rejected
+    - One interview per applicant; cancel it first to pick another slot
+    - Slots that clash with the user's interviews for other clubs cannot be booked
+    - The user is emailed the details of the interview
+    """
+    return book_interview(form_id, cur_user["uid"], db, booking.slot_id)
+
+
+@router.delete(
+    "/{form_id}/book",
+    status_code=status.HTTP_200_OK,
+    summary="Cancel Interview Booking",
+    description="Cancels the current user's interview in the published schedule of a form.",
+    response_description="Cancellation confirmation",
+    responses={404: {"description": "The user has no interview for this form"}},
+)
+async def cancel_interview_booking(
+    form_id: int,
+    cur_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Cancel the current user's interview for a form, freeing the seat for other applicants.
+
+    - Authentication required: User must be logged in
+    """
+    return cancel_booking(form_id, cur_user["uid"], db)
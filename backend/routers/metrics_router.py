@@ -0,0 +1,43 @@
+import secrets
+from os import getenv
+
+from fastapi import APIRouter, Header, HTTPException, status
+
+from models.notifications.notifications_config import outbox_stats
+from utils.database_utils import get_pool_metrics
+from utils.query_stats_utils import get_route_query_stats
+from utils.session_utils import reaper_stats
+
+# requests to the metrics endpoints must send this value in the X-Metrics-Token header. if unset, they are disabled.
+METRICS_TOKEN = getenv("METRICS_TOKEN")
+
+router = APIRouter(tags=["Internal"], responses={403: {"description": "Invalid metrics token"},
+                                                 404: {"description": "Metrics are disabled (METRICS_TOKEN is not set)"}}, )
+
+
+def _check_metrics_token(token: str | None) -> None:
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if token is None or not secrets.compare_digest(token, METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid metrics token")
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK, summary="Get Internal Metrics",
+            description="Returns database connection pool, per-route query and background task metrics for this worker.",
+            response_description="Metrics for the worker that served the request", )
+async def get_metrics(x_metrics_token: str | None = Header(None)):
+    """
+    Get internal metrics for the worker that served this request.
+
+    - Database connection pool: size, checked out connections, overflow usage and checkout wait times
+    - SQL statements per route: the routes issuing the most statements per request, and time spent in the database
+    - Email outbox: emails sent, retried and given up on, bulk requests made, and status digests queued
+    - Expired session reaper: rows removed and duration of the last pass
+
+    Every uvicorn worker has its own pool, so the numbers are per worker.
+
+    - Requires the X-Metrics-Token header to match METRICS_TOKEN. Without METRICS_TOKEN the endpoint does not exist
+    """
+    _check_metrics_token(x_metrics_token)
+    return {"db_pool": get_pool_metrics(), "queries": get_route_query_stats(), "email_outbox": outbox_stats,
+            "session_reaper": reaper_stats, }
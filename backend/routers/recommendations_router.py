@@ -9,8 +9,8 @@ from sqlalchemy.orm import Session, joinedload
 from models.recommendation_engine.recommend import RecommendationContext
 from models.users.users_model import User
 from schemas.clubs.clubs import ClubOut
-from utils.database_utils import get_db
-from utils.session_utils import get_current_user
+from utils.database_utils import get_read_db
+from utils.session_utils import get_read_only_user
 
 logger = logging.getLogger(__name__)
 
@@ -36,8 +36,8 @@ router = APIRouter(prefix="/recommendations", tags=["Recommendations"],
 @router.get("/clubs", response_model=List[ClubOut], summary="Get AI-based Club Recommendations",
     description="Provides personalized club recommendations for the authenticated user based on their profile and interests.",
     response_description="List of recommended clubs ordered by relevance", )
-async def get_club_recommendations_for_user_strategy(db: Session = Depends(get_db),
-        current_user_data: Dict[str, Any] = Depends(get_current_user)):
+async def get_club_recommendations_for_user_strategy(db: Session = Depends(get_read_db),
+        current_user_data: Dict[str, Any] = Depends(get_read_only_user)):
     """
     Get personalized club recommendations using a strategy pattern.
 
@@ -56,7 +56,7 @@ async def get_club_recommendations_for_user_strategy(db: Session = Depends(get_d
     """
     user_id = current_user_data.get("uid")
     if not user_id or not isinstance(user_id, str):
-        logger.error(f"Invalid user identifier from get_current_user: {user_id}")
+        logger.error(f"Invalid user identifier from get_read_only_user: {user_id}")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user identifier.")
 
     user = get_user_profile_with_clubs(user_id, db)
@@ -1,15 +1,15 @@
 from typing import List
 
-from fastapi import APIRouter, Cookie, Depends, HTTPException, Response, status, Path, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Path, Query, Body
 from sqlalchemy.orm import Session
 
 from models.club_recruitment.club_recruitment_config import (create_form, delete_form, get_form_applicant_emails,
                                                              get_form_by_id, get_forms_by_club, update_form, )
 from models.clubs.clubs_config import get_all_subscribers
-from models.users.users_config import (inform_users, is_admin_of_club, is_member_of_club, )
+from models.users.users_config import AuthzContext, get_authz_context, inform_users
 from schemas.form.form import FormCreate, FormOut, FormUpdate
 from utils.database_utils import get_db
-from utils.session_utils import SESSION_COOKIE_NAME, get_current_user
+from utils.session_utils import get_current_user, get_read_only_user
 
 router = APIRouter(tags=["Recruitment Forms"],
     responses={401: {"description": "Not authenticated"}, 403: {"description": "Forbidden - insufficient permissions"},
@@ -27,7 +27,8 @@ async def create_new_form(form_data: FormCreate = Body(...,
     example={"club_id": "cs-club", "name": "Web Development Team Recruitment", "deadline": "2025-05-01T23:59:59Z",
         "questions": [{"question_text": "Why do you want to join our club?", "question_order": 1},
             {"question_text": "What relevant experience do you have?", "question_order": 2}]}),
-        encrypted_session_id: str = Cookie(None, alias=SESSION_COOKIE_NAME), db: Session = Depends(get_db), ):
+        user: dict = Depends(get_current_user), db: Session = Depends(get_db),
+        authz: AuthzContext = Depends(get_authz_context), ):
     """
     Create a new recruitment form for a specific club.
 
@@ -47,8 +48,7 @@ async def create_new_form(form_data: FormCreate = Body(...,
     - Returns the newly created form details including the generated form ID
     """
     try:
-        user = await get_current_user(encrypted_session_id, db)
-        if not is_admin_of_club(user["uid"], form_data.club_id, db):
+        if not authz.role(form_data.club_id, db).is_admin:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to create a form for this club.", )
         new_form = await create_form(db, form_data)
@@ -58,7 +58,7 @@ async def create_new_form(form_data: FormCreate = Body(...,
                 f"A new hiring round has been created by the club {new_form.club_id}.\n" + "Head to clubs-plus-plus to see more!\n")
 
         subscribers = get_all_subscribers(db, new_form.club_id)  # type: ignore
-        inform_users(subscribers, subject, content)
+        inform_users(subscribers, subject, content, db)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     return new_form
@@ -133,7 +133,8 @@ async def update_existing_form(form_id: int = Path(..., description="The unique
                 "questions": [{"question_text": "Why do you want to join our club?", "question_order": 1},
                     {"question_text": "What relevant experience do you have?", "question_order": 2},
                     {"question_text": "New question added", "question_order": 3}]}),
-        encrypted_session_id: str = Cookie(None, alias=SESSION_COOKIE_NAME), db: Session = Depends(get_db), ):
+        user: dict = Depends(get_current_user), db: Session = Depends(get_db),
+        authz: AuthzContext = Depends(get_authz_context), ):
     """
     Update an existing recruitment form.
 
@@ -151,14 +152,11 @@ async def update_existing_form(form_id: int = Path(..., description="The unique
     - Returns the updated form details
     """
     try:
-        user = await get_current_user(encrypted_session_id, db)
         form = await get_form_by_id(db, form_id)
         if not form:
             raise HTTPException(status_code=404, detail="Form not found")
 
-        if not (is_member_of_club(user["uid"], form.club_id, db)  # type: ignore
-                or is_admin_of_club(user["uid"], form.club_id, db)  # type: ignore
-        ):
+        if not authz.role(form.club_id, db).is_member_or_admin:  # type: ignore
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to update this form.", )
 
@@ -169,7 +167,7 @@ async def update_existing_form(form_id: int = Path(..., description="The unique
                 f"Hiring round {updated_form.name} has been updated by the club {updated_form.club_id}.\n" + "Head to clubs-plus-plus to see more!\n")
 
         subscribers = get_all_subscribers(db, updated_form.club_id)  # type: ignore
-        inform_users(subscribers, subject, content)
+        inform_users(subscribers, subject, content, db)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -183,7 +181,8 @@ async def update_existing_form(form_id: int = Path(..., description="The unique
     responses={404: {"description": "Form not found"},
         403: {"description": "User is not authorized to delete this form"}})
 async def delete_existing_form(form_id: int = Path(..., description="The unique identifier of the form to delete"),
-        encrypted_session_id: str = Cookie(None, alias=SESSION_COOKIE_NAME), db: Session = Depends(get_db), ):
+        user: dict = Depends(get_current_user), db: Session = Depends(get_db),
+        authz: AuthzContext = Depends(get_authz_context), ):
     """
     Delete a recruitment form permanently.
 
@@ -199,12 +198,11 @@ async def delete_existing_form(form_id: int = Path(..., description="The unique
     - Returns no content on successful deletion
     """
     try:
-        user = await get_current_user(encrypted_session_id, db)
         form = await get_form_by_id(db, form_id)
         if not form:
             raise HTTPException(status_code=404, detail="Form not found")
 
-        if not is_admin_of_club(user["uid"], form.club_id, db):  # type: ignore
+        if not authz.role(form.club_id, db).is_admin:  # type: ignore
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to delete this form.", )
         subscribers = get_all_subscribers(db, form.club_id)  # type: ignore
@@ -214,7 +212,7 @@ async def delete_existing_form(form_id: int = Path(..., description="The unique
         subject = f"Hiring Round Deleted: {form.name}"
         content = (f"Hiring round {form.name} has been deleted by the club {form.club_id}.\n")
 
-        inform_users(subscribers, subject, content)
+        inform_users(subscribers, subject, content, db)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -228,7 +226,8 @@ async def delete_existing_form(form_id: int = Path(..., description="The unique
     response_description="List of applicant email addresses", responses={404: {"description": "Form not found"},
         403: {"description": "User is not authorized to view applicant emails"}})
 async def get_applicants_emails(form_id: int = Path(..., description="The unique identifier of the form"),
-        encrypted_session_id: str = Cookie(None, alias=SESSION_COOKIE_NAME), db: Session = Depends(get_db), ):
+        user: dict = Depends(get_read_only_user), db: Session = Depends(get_db),
+        authz: AuthzContext = Depends(get_authz_context), ):
     """
     Get email addresses of all applicants who applied to a specific form.
 
@@ -241,18 +240,13 @@ async def get_applicants_emails(form_id: int = Path(..., description="The unique
     - Returns a list of email addresses
     """
     try:
-        # Get current user for authorization
-        user = await get_current_user(encrypted_session_id, db)
-
         # Get the form to check club ownership
         form = await get_form_by_id(db, form_id)
         if not form:
             raise HTTPException(status_code=404, detail="Form not found")
 
         # Verify the user is authorized to view applicant emails
-        if not (is_member_of_club(user["uid"], form.club_id, db)  # type: ignore
-                or is_admin_of_club(user["uid"], form.club_id, db)  # type: ignore
-        ):
+        if not authz.role(form.club_id, db).is_member_or_admin:  # type: ignore
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to view applicant emails for this form.", )
 
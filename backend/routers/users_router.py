@@ -13,13 +13,14 @@ from cas import CASClient
 from fastapi import (APIRouter, Depends, Response, Request, status, Cookie, HTTPException, Path, Query, Body, )
 from sqlalchemy.orm import Session
 
-from models.users.users_config import (get_clubs_by_user, is_admin_of_club, is_member_of_club, user_login_cas,
+from models.users.users_config import (get_clubs_by_user, get_club_role, user_login_cas,
                                        user_logout, )
 from models.users.users_model import User
 from schemas.clubs.clubs import ClubOut
 from schemas.user.user import UserProfileUpdate
 from utils.database_utils import get_db
-from utils.session_utils import (SESSION_COOKIE_NAME, check_current_user, get_current_user, )
+from utils.session_utils import (SESSION_COOKIE_NAME, check_current_user, evict_cached_user_sessions,
+                                 get_current_user, get_read_only_user, )
 
 # Configure CAS authentication client
 CAS_SERVER_URL = getenv("CAS_SERVER_URL")
@@ -105,7 +106,7 @@ async def get_user_info(current_user: dict = Depends(get_current_user)):
             description="Checks if the current user is an admin or member of the specified club.",
             response_description="User's role information for the specified club", )
 async def get_user_role(club_id: str = Path(..., description="The unique identifier of the club"),
-                        current_user: dict = Depends(get_current_user), db: Session = Depends(get_db), ):
+                        current_user: dict = Depends(get_read_only_user), db: Session = Depends(get_db), ):
     """
     Check the current user's role in a specific club.
 
@@ -118,15 +119,15 @@ async def get_user_role(club_id: str = Path(..., description="The unique identif
     - Authentication required: User must be logged in
     - Returns boolean values indicating admin and member status
     """
-    return {"is_admin": is_admin_of_club(current_user["uid"], club_id, db),
-            "is_member": is_member_of_club(current_user["uid"], club_id, db), }
+    role = get_club_role(current_user["uid"], club_id, db)
+    return {"is_admin": role.is_admin, "is_member": role.is_member, }
 
 
 @router.get("/user_club_info", status_code=status.HTTP_200_OK, response_model=List[ClubOut],
             summary="Get User Club Memberships",
             description="Retrieves all clubs that the current user is a member or admin of.",
             response_description="List of clubs the user belongs to", )
-async def get_user_club_info(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db), ):
+async def get_user_club_info(current_user: dict = Depends(get_read_only_user), db: Session = Depends(get_db), ):
     """
     Get all clubs that the current user is a member or admin of.
 
@@ -242,6 +243,8 @@ async def update_user_profile(profile_update: UserProfileUpdate = Body(..., desc
     try:
         db.commit()
         db.refresh(db_user)  # Refresh to get the latest state from DB
+        # cached sessions hold a copy of the profile, so drop them
+        evict_cached_user_sessions(user_uid)
     except ValueError as e:
         db.rollback()
         print(f"Immutable field update attempt failed: {e}")
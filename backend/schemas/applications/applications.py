@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List, Optional, Any
+from typing import List, Literal, Optional, Any
 
 from models.applications.applications_model import ApplicationStatus
 
@@ -9,6 +9,24 @@ class ApplicationStatusUpdate(BaseModel):
     status: ApplicationStatus
 
 
+class ApplicationStatusChange(BaseModel):
+    application_id: int
+    status: ApplicationStatus
+
+
+class BulkStatusUpdate(BaseModel):
+    updates: List[ApplicationStatusChange] = []
+    # also reject every other application of the form that is still ongoing
+    reject_remaining: bool = False
+
+
+class BulkStatusOutcome(BaseModel):
+    application_id: int
+    outcome: Literal["updated", "unchanged", "not_found"]
+    status: Optional[ApplicationStatus] = None
+    detail: Optional[str] = None
+
+
 class ResponseOut(BaseModel):
     id: int
     question_id: int
@@ -68,6 +86,7 @@ class FormApplicationOut(BaseModel):
     user_name: str
     user_email: str
     form_id: int
+    form_name: Optional[str] = None
     status: ApplicationStatus
     endorser_ids: List[str] = []
     endorser_count: int = 0
@@ -0,0 +1,87 @@
+"""
+Shared fixtures for the backend tests.
+
+The tests run against the PostgreSQL database in TEST_DATABASE_URL, whose tables are dropped and recreated. They are
+skipped when it is not set. Routers are mounted on a bare FastAPI app, so the tests do not need LDAP or CAS.
+"""
+
+import os
+from contextlib import ExitStack
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+# the database utils read their settings at import, so point them at the test database first
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ["ASYNC_DATABASE_URL"] = TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+    os.environ.pop("ASYNC_DATABASE_REPLICA_URL", None)
+    os.environ.setdefault("MAIL_TRANSPORT", "fake")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+# import every model so that Base.metadata knows about all the tables
+import models.applications.applications_model  # noqa: E402,F401
+import models.calendar.calendar_events_model  # noqa: E402,F401
+import models.calendar.interview_models  # noqa: E402,F401
+import models.club_recruitment.club_recruitment_model  # noqa: E402,F401
+import models.clubs.clubs_model  # noqa: E402,F401
+import models.notifications.notifications_model  # noqa: E402,F401
+import models.users.session_model  # noqa: E402,F401
+import models.users.users_model  # noqa: E402,F401
+from utils.database_utils import Base, SessionLocal, async_engine, engine, reset_db  # noqa: E402
+from utils.session_utils import SESSION_COOKIE_NAME, create_session  # noqa: E402
+
+
+def pytest_collection_modifyitems(config, items):
+    if TEST_DATABASE_URL:
+        return
+    skip = pytest.mark.skip(reason="TEST_DATABASE_URL is not set")
+    for item in items:
+        item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Drops and recreates every table once per run, applying all migrations."""
+    assert reset_db(), "could not reset the test database"
+    yield engine
+
+
+@pytest.fixture
+def db(database):
+    """A session on the test database. Every table is emptied afterwards."""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+        with database.begin() as connection:
+            connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+
+@pytest.fixture
+def make_client(database):
+    """Builds test clients for apps serving the given (router, prefix) pairs."""
+    with ExitStack() as stack:
+        def make(*routers: tuple) -> TestClient:
+            app = FastAPI()
+            for router, prefix in routers:
+                app.include_router(router, prefix=prefix)
+            client = stack.enter_context(TestClient(app))
+            # the async connection pool belongs to the event loop of the client
+            stack.callback(client.portal.call, async_engine.dispose)
+            return client
+
+        yield make
+
+
+def login(db, uid: str) -> dict:
+    """Session cookies for the given user."""
+    encrypted_session_id, _ = create_session(uid, "pytest", "127.0.0.1", db)
+    return {SESSION_COOKIE_NAME: encrypted_session_id}
@@ -0,0 +1,57 @@
+"""
+The application detail view must take a fixed number of statements, however many questions the form has.
+"""
+
+import pytest
+
+from conftest import login
+from models.applications.applications_model import Application, Response
+from models.club_recruitment.club_recruitment_model import Form, Question
+from models.clubs.clubs_model import Club
+from models.users.users_model import User
+from routers.applications_router import router as applications_router
+from utils.query_stats_utils import max_queries
+from utils.session_utils import session_cache
+
+
+@pytest.fixture
+def applications(db):
+    """Application ids by question count, all by the same applicant to forms of a club with one member."""
+    member = User(uid="member", email="member@example.com", roll_number="2")
+    db.add_all([User(uid="applicant", email="applicant@example.com", roll_number="1"),
+                Club(cid="club", name="Club", members=[member])])
+    db.flush()
+
+    application_ids = {}
+    for question_count in (3, 30):
+        form = Form(name=f"Form with {question_count} questions", club_id="club",
+                    questions=[Question(question_text=f"Question {order}", question_order=order)
+                               for order in range(question_count)])
+        db.add(form)
+        db.flush()
+        application = Application(form_id=form.id, user_id="applicant",
+                                  responses=[Response(question_id=question.id, answer_text="Answer")
+                                             for question in form.questions])
+        db.add(application)
+        db.flush()
+        application_ids[question_count] = application.id
+    db.commit()
+    return application_ids
+
+
+@pytest.mark.parametrize("viewer", ["applicant", "member"])
+def test_detail_statements_do_not_grow_with_questions(db, make_client, applications, viewer):
+    client = make_client((applications_router, "/api/application"))
+    client.cookies.update(login(db, viewer))
+
+    statements = {}
+    for question_count, application_id in applications.items():
+        # every request looks the session up again, so the counts are comparable
+        session_cache.clear()
+        with max_queries(10) as stats:
+            response = client.get(f"/api/application/{application_id}")
+        assert response.status_code == 200
+        assert len(response.json()["responses"]) == question_count
+        statements[question_count] = stats.count
+
+    assert statements[3] == statements[30], statements
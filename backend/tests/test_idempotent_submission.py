@@ -0,0 +1,53 @@
+"""
+Concurrent retries of one submission must create exactly one application.
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from conftest import login
+from models.applications.applications_model import Application, Response
+from models.club_recruitment.club_recruitment_model import Form, Question
+from models.clubs.clubs_model import Club
+from models.users.users_model import User
+from routers.applications_router import router as applications_router
+from utils.database_utils import async_engine
+
+SUBMISSIONS = 20
+
+
+def test_concurrent_submissions_with_one_key_create_one_application(db):
+    db.add_all([User(uid="applicant", email="applicant@example.com", roll_number="1"),
+                Club(cid="club", name="Club")])
+    db.flush()
+    db.add(Form(name="Recruitment", club_id="club", questions=[Question(question_text="Why?", question_order=1)]))
+    db.commit()
+    form = db.query(Form).one()
+    cookies = login(db, "applicant")
+    submission = {"form_id": form.id, "responses": [{"question_id": form.questions[0].id, "answer_text": "Because"}]}
+
+    app = FastAPI()
+    app.include_router(applications_router, prefix="/api/application")
+
+    async def submit(keys: list[str]) -> list[httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", cookies=cookies) as client:
+            try:
+                return await asyncio.gather(*(client.post("/api/application/submit-application", json=submission,
+                                                          headers={"Idempotency-Key": key}) for key in keys))
+            finally:
+                # the async pool belongs to this event loop
+                await async_engine.dispose()
+
+    responses = asyncio.run(submit(["retried-key"] * SUBMISSIONS))
+
+    assert [response.status_code for response in responses] == [201] * SUBMISSIONS
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert db.query(Application).count() == 1
+    assert db.query(Response).count() == 1
+
+    # a different submission to the same form is still turned away
+    [response] = asyncio.run(submit(["another-key"]))
+    assert response.status_code == 400
@@ -0,0 +1,113 @@
+"""
+The hot lookups must be served by the indexes the migrations create, not by sequential scans.
+"""
+
+import re
+from datetime import datetime
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import select, text
+
+from models.applications.applications_model import Application, Response
+from models.calendar.calendar_events_model import CalendarEvent
+from models.calendar.interview_models import InterviewPanel, InterviewSchedule, InterviewSlot
+from models.club_recruitment.club_recruitment_model import Question
+from models.clubs.clubs_model import club_members
+from models.users.session_model import Session
+from utils.database_utils import ALEMBIC_CONFIG_PATH
+
+SEED = [
+    "INSERT INTO users (uid, email, roll_number, first_name) "
+    "SELECT 'user' || g, 'user' || g || '@example.com', 'roll' || g, 'User ' || g FROM generate_series(1, 2000) g",
+    "INSERT INTO clubs (cid, name) SELECT 'club' || g, 'Club ' || g FROM generate_series(1, 50) g",
+    "INSERT INTO club_members (club_id, user_id, role) "
+    "SELECT 'club' || (g % 50 + 1), 'user' || g, 'member' FROM generate_series(1, 2000) g",
+    "INSERT INTO forms (id, name, club_id) SELECT g, 'Form ' || g, 'club' || (g % 50 + 1) FROM generate_series(1, 200) g",
+    "INSERT INTO questions (form_id, question_text, question_order) "
+    "SELECT form.id, 'Question ' || g, g FROM forms form, generate_series(1, 5) g",
+    "INSERT INTO applications (form_id, user_id, status, submitted_at, endorser_ids, endorser_count) "
+    "SELECT (g + g / 2000 * 67) % 200 + 1, 'user' || (g % 2000 + 1), 'ongoing', now(), ARRAY['user' || (g % 7 + 1)], 1 "
+    "FROM generate_series(0, 5999) g",
+    "INSERT INTO responses (application_id, question_id, answer_text) "
+    "SELECT application.id, question.id, 'answer' FROM applications application "
+    "JOIN questions question ON question.form_id = application.form_id",
+    "INSERT INTO interview_schedule (id, form_id, club_id, slot_length, num_panels) "
+    "SELECT id, id, club_id, 30, 2 FROM forms",
+    "INSERT INTO interview_panel (interview_schedule_id, club_id) "
+    "SELECT schedule.id, schedule.club_id FROM interview_schedule schedule, generate_series(1, 2)",
+    "INSERT INTO interview_slot (interview_schedule_id, club_id, date, start_time, end_time) "
+    "SELECT schedule.id, schedule.club_id, DATE '2026-11-02', make_time(9 + g / 2, g % 2 * 30, 0), "
+    "make_time(9 + g / 2, g % 2 * 30 + 29, 0) FROM interview_schedule schedule, generate_series(0, 15) g",
+    "INSERT INTO calendar_event (interview_schedule_id, panel_id, interview_slot_id, visible_to_user, club_id, "
+    "type, title, date, start_time, end_time) "
+    "SELECT slot.interview_schedule_id, (SELECT min(id) FROM interview_panel panel "
+    "WHERE panel.interview_schedule_id = slot.interview_schedule_id), slot.id, 'user' || (slot.id % 2000 + 1), "
+    "slot.club_id, 'interview', 'Interview', slot.date, slot.start_time, slot.end_time FROM interview_slot slot",
+    "INSERT INTO sessions (id, user_uid, expires_at) "
+    "SELECT 'session' || g, 'user' || (g % 2000 + 1), now() + interval '1 day' FROM generate_series(1, 20000) g",
+]
+
+HOT_QUERIES = {
+    "applications by form": select(Application).where(Application.form_id == 7),
+    "applications endorsed by a user": select(Application).where(Application.endorser_ids.contains(["user3"])),
+    "responses by application": select(Response).where(Response.application_id == 42),
+    "questions by form": select(Question).where(Question.form_id == 7),
+    "clubs of a user": select(club_members).where(club_members.c.user_id == "user42"),
+    "events visible to a user": select(CalendarEvent).where(CalendarEvent.visible_to_user == "user42"),
+    "events of a club": select(CalendarEvent).where(CalendarEvent.club_id == "club7"),
+    "events of a schedule": select(CalendarEvent).where(CalendarEvent.interview_schedule_id == 7),
+    "slots of a schedule": select(InterviewSlot).where(InterviewSlot.interview_schedule_id == 7),
+    "panels of a schedule": select(InterviewPanel).where(InterviewPanel.interview_schedule_id == 7),
+    "schedule of a form": select(InterviewSchedule).where(InterviewSchedule.form_id == 7,
+                                                          InterviewSchedule.club_id == "club8"),
+    "session validation": select(Session).where(Session.id == "session42", Session.expires_at > datetime.now()),
+    "sessions of a user": select(Session).where(Session.user_uid == "user42"),
+}
+
+
+@pytest.fixture(scope="module")
+def seeded(database):
+    """Rebuilds the schema changes from scratch with the migrations, then seeds a dataset inside a transaction."""
+    alembic_config = Config(ALEMBIC_CONFIG_PATH)
+    alembic_config.attributes["configure_logger"] = False
+    command.downgrade(alembic_config, "base")
+    command.upgrade(alembic_config, "head")
+
+    with database.connect() as connection:
+        transaction = connection.begin()
+        for statement in SEED:
+            connection.execute(text(statement))
+        connection.execute(text("ANALYZE"))
+        # small tables are cheaper to scan than to look up, so make the planner prefer any usable index
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        yield connection
+        transaction.rollback()
+
+
+def _scans(plan: dict):
+    if "Scan" in plan["Node Type"] and plan["Node Type"] != "Bitmap Heap Scan":
+        yield plan
+    for child in plan.get("Plans", []):
+        yield from _scans(child)
+
+
+def _leading_column(connection, index_name: str) -> str:
+    return connection.execute(text(
+        "SELECT attribute.attname FROM pg_index i JOIN pg_class index ON index.oid = i.indexrelid "
+        "JOIN pg_attribute attribute ON attribute.attrelid = i.indrelid AND attribute.attnum = i.indkey[0] "
+        "WHERE index.relname = :index_name"), {"index_name": index_name}).scalar_one()
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_an_index(seeded, name):
+    compiled = HOT_QUERIES[name].compile(dialect=seeded.dialect)
+    [[explained]] = seeded.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).all()
+
+    for scan in _scans(explained[0]["Plan"]):
+        assert scan["Node Type"] != "Seq Scan", f"{name} scans {scan['Relation Name']}"
+        # an index only narrows the lookup down when its first column is part of the condition, otherwise the
+        # whole index is walked
+        column = _leading_column(seeded, scan["Index Name"])
+        assert re.search(rf"\b{column}\b", scan.get("Index Cond", "")), f"{name} walks all of {scan['Index Name']}"
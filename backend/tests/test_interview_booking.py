@@ -0,0 +1,102 @@
+"""
+Self-booking of interview slots in a published schedule.
+"""
+
+import time as clock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text, update
+
+from models.applications.applications_model import Application
+from models.calendar.booking_config import book_interview, get_availability, get_published_schedule, publish_schedule
+from models.calendar.calendar_events_model import CalendarEvent
+from models.calendar.interview_models import InterviewSlot
+from models.calendar.interviews_config import create_schedule
+from models.club_recruitment.club_recruitment_model import Form
+from models.clubs.clubs_model import Club
+from models.users.users_model import User
+from utils.database_utils import SessionLocal
+
+INTERVIEW_DAY = date(2026, 11, 2)
+
+
+@pytest.fixture
+def form_id(db):
+    """A form with applicants a1 to a4."""
+    db.add(Club(cid="club", name="Club"))
+    db.flush()
+    form = Form(name="Recruitment", club_id="club")
+    db.add(form)
+    db.flush()
+    for index in range(1, 5):
+        db.add(User(uid=f"a{index}", email=f"a{index}@example.com", first_name=f"a{index}", last_name="Applicant",
+                    roll_number=str(index)))
+        db.flush()
+        db.add(Application(form_id=form.id, user_id=f"a{index}"))
+    db.commit()
+    return form.id
+
+
+def publish(db, form_id: int, starts: list[time], num_panels: int = 1) -> dict[time, int]:
+    """Publishes a schedule of 30 minute slots. Returns the slot ids by start time."""
+    slots = [(datetime.combine(INTERVIEW_DAY, start), datetime.combine(INTERVIEW_DAY, start.replace(minute=30)),
+              INTERVIEW_DAY) for start in starts]
+    schedule_id, slot_ids, _ = create_schedule("club", form_id, slots, 30, num_panels, db)
+    publish_schedule(db, schedule_id)
+    return dict(zip(starts, slot_ids))
+
+
+def wait_until_blocked_by(db, other_db):
+    """Waits until some session waits for a lock held by other_db."""
+    pid = other_db.scalar(text("SELECT pg_backend_pid()"))
+    for _ in range(500):
+        if db.scalar(text("SELECT count(*) FROM pg_stat_activity WHERE :pid = ANY(pg_blocking_pids(pid))"),
+                     {"pid": pid}):
+            return
+        clock.sleep(0.01)
+    raise AssertionError("nobody is waiting for the lock")
+
+
+def test_republished_schedule_drops_old_slots(db, form_id):
+    slot_ids = publish(db, form_id, [time(9), time(10), time(11)])
+    book_interview(form_id, "a1", db, slot_ids[time(9)])
+
+    new_slot_ids = publish(db, form_id, [time(11), time(12)])
+
+    availability = get_availability(get_published_schedule(form_id, db), db)
+    assert [slot["slot_id"] for slot in availability] == [new_slot_ids[time(11)], new_slot_ids[time(12)]]
+    for removed in (time(9), time(10)):
+        with pytest.raises(HTTPException) as error:
+            book_interview(form_id, "a2", db, slot_ids[removed])
+        assert error.value.status_code == 404
+
+    # a1 was moved to the earliest slot of the new schedule, and "any slot" bookings only get the new slots
+    [a1_event] = db.query(CalendarEvent).filter(CalendarEvent.visible_to_user == "a1").all()
+    assert a1_event.interview_slot_id == new_slot_ids[time(11)]
+    assert book_interview(form_id, "a2", db)["slot_id"] == new_slot_ids[time(12)]
+    with pytest.raises(HTTPException) as error:
+        book_interview(form_id, "a3", db)
+    assert error.value.status_code == 409
+
+
+def test_any_slot_booking_gets_a_seat_freed_while_it_waits(db, form_id):
+    slot_ids = publish(db, form_id, [time(9), time(10)], num_panels=2)
+    book_interview(form_id, "a2", db, slot_ids[time(9)])
+    db.execute(update(InterviewSlot).where(InterviewSlot.id == slot_ids[time(10)]).values(booked_count=2))
+    db.commit()
+
+    with SessionLocal() as taking_last_seat, SessionLocal() as booking, ThreadPoolExecutor(1) as executor:
+        # the only slot with room is being booked by someone else, so the booking waits for it
+        taking_last_seat.execute(update(InterviewSlot).where(InterviewSlot.id == slot_ids[time(9)])
+                                 .values(booked_count=2))
+        future = executor.submit(book_interview, form_id, "a1", booking)
+        wait_until_blocked_by(db, taking_last_seat)
+
+        # meanwhile a seat is freed in the other slot, and then the slot being waited for fills up
+        db.execute(update(InterviewSlot).where(InterviewSlot.id == slot_ids[time(10)]).values(booked_count=1))
+        db.commit()
+        taking_last_seat.commit()
+        assert future.result(timeout=10)["slot_id"] == slot_ids[time(10)]
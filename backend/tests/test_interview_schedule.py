@@ -0,0 +1,124 @@
+"""
+Resubmitting an interview schedule must only move the interviews it has to, and rejected applicants are never
+scheduled.
+"""
+
+from collections import Counter
+from datetime import date, datetime, time
+
+import pytest
+
+from models.applications.applications_model import Application, ApplicationStatus
+from models.calendar.calendar_events_model import CalendarEvent
+from models.calendar.interview_models import InterviewPanel, InterviewSlot
+from models.calendar.interviews_config import (
+    ScheduleInterviewFormResponseStr,
+    allocate_calendar_events,
+    create_schedule,
+    parse_schedule_interview_form_data,
+    preview_schedule,
+    release_interviews,
+)
+from models.club_recruitment.club_recruitment_model import Form
+from models.clubs.clubs_model import Club
+from models.notifications.notifications_model import OutboxEmail
+from models.users.users_model import User
+
+INTERVIEW_DAY = date(2026, 11, 2)
+
+
+@pytest.fixture
+def form_id(db):
+    """A form with three applicants (a1 most endorsed) and a rejected one endorsed more than all of them."""
+    db.add(Club(cid="club", name="Club"))
+    db.flush()
+    form = Form(name="Recruitment", club_id="club")
+    db.add(form)
+    db.flush()
+    for user_id, endorser_count, status in [("a1", 3, ApplicationStatus.ongoing), ("a2", 2, ApplicationStatus.ongoing),
+                                            ("a3", 1, ApplicationStatus.under_review),
+                                            ("rejected", 10, ApplicationStatus.rejected)]:
+        db.add(User(uid=user_id, email=f"{user_id}@example.com", first_name=user_id, last_name="Applicant",
+                    roll_number=user_id))
+        db.flush()
+        db.add(Application(form_id=form.id, user_id=user_id, status=status, endorser_count=endorser_count))
+    db.commit()
+    return form.id
+
+
+def schedule(db, form_id: int, starts: list[time], num_panels: int):
+    slots = [(datetime.combine(INTERVIEW_DAY, start), datetime.combine(INTERVIEW_DAY, start.replace(minute=30)),
+              INTERVIEW_DAY) for start in starts]
+    schedule_id, slot_ids, panel_ids = create_schedule("club", form_id, slots, 30, num_panels, db)
+    allocate_calendar_events(schedule_id, slot_ids, panel_ids, db, "club", form_id)
+    return schedule_id
+
+
+def events_by_user(db) -> dict:
+    return {event.visible_to_user: event for event in db.query(CalendarEvent)}
+
+
+def emails(db) -> list[tuple[str, str]]:
+    return sorted((email.recipients[0]["email"], email.subject) for email in db.query(OutboxEmail))
+
+
+def assert_booked_counts_match(db):
+    events_in_slot = Counter(event.interview_slot_id for event in db.query(CalendarEvent))
+    assert {slot.id: slot.booked_count for slot in db.query(InterviewSlot)} == {
+        slot.id: events_in_slot[slot.id] for slot in db.query(InterviewSlot)}
+
+
+def test_resubmission_moves_only_interviews_of_removed_slots(db, form_id):
+    schedule(db, form_id, [time(9), time(10), time(11)], num_panels=2)
+    before = events_by_user(db)
+    assert set(before) == {"a1", "a2", "a3"}
+    removed_slot = db.get(InterviewSlot, before["a1"].interview_slot_id)
+    moved = {user_id for user_id, event in before.items() if event.interview_slot_id == removed_slot.id}
+    db.query(OutboxEmail).delete()
+    db.commit()
+
+    kept_starts = [slot.start_time for slot in db.query(InterviewSlot) if slot.id != removed_slot.id]
+    schedule(db, form_id, kept_starts + [time(12)], num_panels=2)
+    db.expire_all()
+
+    after = events_by_user(db)
+    assert set(after) == {"a1", "a2", "a3"}
+    assert db.get(InterviewSlot, removed_slot.id) is None
+    for user_id, event in after.items():
+        if user_id not in moved:
+            assert (event.id, event.interview_slot_id) == (before[user_id].id, before[user_id].interview_slot_id)
+    assert emails(db) == sorted((f"{user_id}@example.com", "Interview Rescheduled") for user_id in moved)
+    assert_booked_counts_match(db)
+
+
+def test_resubmission_cancels_interviews_without_room(db, form_id):
+    schedule(db, form_id, [time(9)], num_panels=2)
+    assert set(events_by_user(db)) == {"a1", "a2"}
+    db.query(OutboxEmail).delete()
+    db.commit()
+
+    schedule(db, form_id, [time(9)], num_panels=1)
+    db.expire_all()
+
+    [kept] = events_by_user(db)
+    [cancelled] = {"a1", "a2"} - {kept}
+    assert db.query(InterviewPanel).count() == 1
+    assert emails(db) == [(f"{cancelled}@example.com", "Interview Cancelled")]
+    assert_booked_counts_match(db)
+
+
+def test_rejected_applicants_are_not_scheduled(db, form_id):
+    schedule(db, form_id, [time(9)], num_panels=1)
+    assert set(events_by_user(db)) == {"a1"}
+
+    # the freed interview goes to the best applicant still in the running
+    assert release_interviews(db, form_id, "a1") == ["a2"]
+    db.commit()
+    assert set(events_by_user(db)) == {"a2"}
+
+    preview = preview_schedule(form_id, parse_schedule_interview_form_data(ScheduleInterviewFormResponseStr(
+        interviewSchedule={"slotDurationMinutes": 30, "interviewPanelCount": 1, "totalInterviewSlots": 0,
+                           "dates": [{"date": "2026-11-02", "timeRanges": [{"startTime": "09:00",
+                                                                           "endTime": "10:00"}]}]})), db)
+    assert preview["applicant_count"] == 3
+    assert "rejected" not in preview["unassigned"]
@@ -0,0 +1,49 @@
+"""
+Data migrations must fix up rows written before them, and workers starting together must not race on migrating.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from utils.database_utils import ALEMBIC_CONFIG_PATH, drop_all_tables, init_db
+
+
+@pytest.fixture
+def alembic_config():
+    config = Config(ALEMBIC_CONFIG_PATH)
+    config.attributes["configure_logger"] = False
+    yield config
+    command.upgrade(config, "head")
+
+
+def test_submitted_at_is_backfilled_and_required(db, alembic_config):
+    command.downgrade(alembic_config, "0005")
+    db.execute(text("INSERT INTO users (uid) VALUES ('applicant')"))
+    db.execute(text("INSERT INTO forms (id, name) VALUES (1, 'Recruitment')"))
+    db.execute(text("INSERT INTO applications (form_id, user_id, submitted_at) VALUES (1, 'applicant', NULL)"))
+    db.commit()
+
+    command.upgrade(alembic_config, "head")
+
+    assert db.execute(text("SELECT submitted_at IS NOT NULL FROM applications")).scalar_one()
+    with pytest.raises(IntegrityError):
+        db.execute(text("UPDATE applications SET submitted_at = NULL"))
+    db.rollback()
+
+
+def test_workers_starting_together_migrate_once(database, alembic_config):
+    assert drop_all_tables()
+
+    with ThreadPoolExecutor(4) as executor:
+        for future in [executor.submit(init_db) for _ in range(4)]:
+            future.result()
+
+    with database.connect() as connection:
+        assert connection.execute(text("SELECT version_num FROM alembic_version")).scalars().all() == [
+            ScriptDirectory.from_config(alembic_config).get_current_head()]
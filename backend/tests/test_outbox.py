@@ -0,0 +1,92 @@
+"""
+The outbox dispatcher must not hold row locks while sending, and must retry, give up on and purge emails.
+"""
+
+import datetime
+
+import pytest
+from sqlalchemy import select, update
+
+from models.notifications import notifications_config
+from models.notifications.notifications_config import dispatch_outbox, enqueue_email, purge_outbox
+from models.notifications.notifications_model import OutboxEmail, OutboxStatus
+from utils.database_utils import SessionLocal
+from utils.mail_utils import FakeTransport
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    monkeypatch.setattr(notifications_config, "rate_limiter", notifications_config.RateLimiter(0))
+
+
+@pytest.fixture
+def outbox(db):
+    for index in range(3):
+        enqueue_email(db, [{"name": f"User {index}", "email": f"user{index}@example.com"}], "Subject", "Content")
+    db.commit()
+    return db
+
+
+class CheckingTransport(FakeTransport):
+    """Runs a check (with its own session) while a bulk request is being sent."""
+
+    def __init__(self, check):
+        super().__init__()
+        self.check = check
+
+    def send_bulk(self, messages):
+        with SessionLocal() as other_db:
+            self.check(other_db)
+        super().send_bulk(messages)
+
+
+def test_emails_are_sent_without_holding_locks(outbox):
+    def check(other_db):
+        # nothing is locked, yet another dispatcher does not pick the claimed emails up again
+        assert len(other_db.execute(select(OutboxEmail).with_for_update(nowait=True)).all()) == 3
+        other_db.rollback()
+        assert dispatch_outbox(other_db, FakeTransport()) == 0
+
+    transport = CheckingTransport(check)
+    assert dispatch_outbox(outbox, transport) == 3
+
+    assert len(transport.sent) == 3
+    emails = outbox.query(OutboxEmail).all()
+    assert {(email.status, email.attempts) for email in emails} == {(OutboxStatus.sent, 1)}
+    assert all(email.sent_at is not None for email in emails)
+
+
+def test_failed_sends_are_retried_then_given_up(outbox, monkeypatch):
+    monkeypatch.setattr(notifications_config, "MAIL_MAX_ATTEMPTS", 2)
+    failing = FakeTransport(failure_rate=1)
+
+    assert dispatch_outbox(outbox, failing) == 3
+    emails = outbox.query(OutboxEmail).all()
+    assert {(email.status, email.attempts) for email in emails} == {(OutboxStatus.pending, 1)}
+    assert all(email.last_error == "Simulated failure" for email in emails)
+    # not due again until the retry delay has passed
+    assert dispatch_outbox(outbox, failing) == 0
+
+    outbox.execute(update(OutboxEmail).values(next_attempt_at=datetime.datetime(2000, 1, 1)))
+    outbox.commit()
+    assert dispatch_outbox(outbox, failing) == 3
+    outbox.expire_all()
+    assert {(email.status, email.attempts) for email in outbox.query(OutboxEmail)} == {(OutboxStatus.failed, 2)}
+
+
+def test_purge_removes_only_old_finished_emails(outbox):
+    long_ago = datetime.datetime(2000, 1, 1)
+    sent, failed, pending = outbox.query(OutboxEmail).order_by(OutboxEmail.id).all()
+    sent.status, sent.sent_at, sent.created_at = OutboxStatus.sent, long_ago, long_ago
+    failed.status, failed.created_at = OutboxStatus.failed, long_ago
+    pending.created_at = long_ago
+    enqueue_email(outbox, [{"name": "Recent", "email": "recent@example.com"}], "Subject", "Content")
+    outbox.flush()
+    outbox.execute(update(OutboxEmail).where(OutboxEmail.status == OutboxStatus.pending,
+                                             OutboxEmail.id != pending.id)
+                   .values(status=OutboxStatus.sent, sent_at=datetime.datetime.now()))
+    outbox.commit()
+
+    assert purge_outbox(outbox, retention_days=30, batch_size=1) == 2
+    assert outbox.query(OutboxEmail.status).order_by(OutboxEmail.id).all() == [(OutboxStatus.pending,),
+                                                                               (OutboxStatus.sent,)]
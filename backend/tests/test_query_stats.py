@@ -0,0 +1,52 @@
+"""
+max_queries and raise_on_lazy_load must catch N+1 patterns.
+"""
+
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
+
+from models.clubs.clubs_model import Club
+from models.users.users_model import User
+from utils.query_stats_utils import max_queries, raise_on_lazy_load
+
+
+@pytest.fixture
+def clubs(db):
+    for index in range(3):
+        club = Club(cid=f"club{index}", name=f"Club {index}")
+        club.members = [User(uid=f"user{index}-{member}", email=f"user{index}-{member}@example.com",
+                             roll_number=f"{index}{member}") for member in range(2)]
+        db.add(club)
+    db.commit()
+    # start with an empty identity map, so the tests load everything themselves
+    db.expunge_all()
+    return db
+
+
+def test_max_queries_fails_on_n_plus_one(clubs):
+    with pytest.raises(AssertionError, match=r"Expected at most 2 statements, got 4[\s\S]*3x SELECT users"):
+        with max_queries(2):
+            for club in clubs.query(Club).all():
+                assert len(club.members) == 2
+
+
+def test_max_queries_passes_eager_load(clubs):
+    with max_queries(2) as stats:
+        for club in clubs.query(Club).options(selectinload(Club.members)).all():
+            assert len(club.members) == 2
+
+    assert stats.count == 2
+
+
+def test_raise_on_lazy_load_fails_on_lazy_members(clubs):
+    with raise_on_lazy_load():
+        club = clubs.query(Club).filter(Club.cid == "club0").one()
+        with pytest.raises(InvalidRequestError, match="Club.members"):
+            club.members
+
+
+def test_raise_on_lazy_load_passes_eager_members(clubs):
+    with raise_on_lazy_load():
+        club = clubs.query(Club).options(selectinload(Club.members)).filter(Club.cid == "club0").one()
+        assert len(club.members) == 2
@@ -1,4 +1,7 @@
 import os
+import random
+import threading
+import time
 from typing import Dict, List
 
 from mailersend import emails
@@ -6,8 +9,18 @@ from mailersend import emails
 api_key = os.getenv("MAILERSEND_API_KEY", "OOF")
 domain = os.getenv("MAILERSEND_DOMAIN", "clubsplusplus.com")
 
+# "mailersend" sends for real, "fake" only records the messages (for local development and load testing).
+MAIL_TRANSPORT = os.getenv("MAIL_TRANSPORT", "mailersend")
+# simulated latency (per bulk request) and failure rate of the fake transport.
+FAKE_MAIL_LATENCY_SECONDS = float(os.getenv("FAKE_MAIL_LATENCY_SECONDS", 0))
+FAKE_MAIL_FAILURE_RATE = float(os.getenv("FAKE_MAIL_FAILURE_RATE", 0))
 
-def send_email(recipients: List[Dict[str, str]], subject: str, content: str) -> None:
+
+class MailSendError(Exception):
+    pass
+
+
+def build_mail_body(recipients: List[Dict[str, str]], subject: str, content: str) -> dict:
     mailer = emails.NewEmail(api_key)
 
     mail_body = {}
@@ -30,7 +43,50 @@ def send_email(recipients: List[Dict[str, str]], subject: str, content: str) ->
     mailer.set_html_content(content, mail_body)
     mailer.set_reply_to(reply_to, mail_body)
 
-    mailer.send(mail_body)
+    return mail_body
+
+
+class MailerSendTransport:
+    """
+    Sends messages through the MailerSend bulk email endpoint (up to 500 messages per request).
+    """
+
+    def send_bulk(self, messages: List[dict]) -> None:
+        # the sdk returns "<status code>\n<body>" instead of raising on errors
+        status_code, _, body = emails.NewEmail(api_key).send_bulk(messages).partition("\n")
+        if not status_code.startswith("2"):
+            raise MailSendError(f"MailerSend returned {status_code}: {body[:500]}")
+
+
+class FakeTransport:
+    """
+    Records messages instead of sending them. Latency and failures can be simulated to load test the outbox.
+    """
+
+    def __init__(self, latency: float = FAKE_MAIL_LATENCY_SECONDS, failure_rate: float = FAKE_MAIL_FAILURE_RATE):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.sent: List[dict] = []
+        self._lock = threading.Lock()
+
+    def send_bulk(self, messages: List[dict]) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise MailSendError("Simulated failure")
+
+        with self._lock:
+            self.requests += 1
+            self.sent.extend(messages)
+
+
+transport = FakeTransport() if MAIL_TRANSPORT == "fake" else MailerSendTransport()
+
+
+# send one email right away. request handlers should queue mail through the notification outbox instead.
+def send_email(recipients: List[Dict[str, str]], subject: str, content: str) -> None:
+    transport.send_bulk([build_mail_body(recipients, subject, content)])
 
 
 if __name__ == "__main__":
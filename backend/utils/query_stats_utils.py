@@ -0,0 +1,167 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from os import getenv
+
+from fastapi import Request
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import ORMExecuteState, Session, raiseload
+
+from utils.database_utils import async_engine, async_replica_engine, engine, replica_engine
+
+# requests that issue more statements than this get their most repeated statements logged (likely N+1 queries).
+SQL_QUERY_LOG_THRESHOLD = int(getenv("SQL_QUERY_LOG_THRESHOLD", 20))
+# make every lazy load of a relationship raise instead of silently issuing a query (meant for tests).
+SQL_RAISE_ON_LAZY_LOAD = getenv("SQL_RAISE_ON_LAZY_LOAD", "False").lower() in ("true", "t", "1")
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryStats:
+    """
+    Statements executed (and time spent in the database) during one request, or one max_queries block.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.writes = 0
+        self.total_seconds = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        statement = _WHITESPACE.sub(" ", statement).strip()
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.statements[statement] += 1
+            if not statement.upper().startswith(("SELECT", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")):
+                self.writes += 1
+
+    def top_offenders(self, limit: int = 5) -> list[tuple[str, int]]:
+        with self._lock:
+            return self.statements.most_common(limit)
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+# stats objects of active max_queries blocks. they see statements from every request, not just the current context.
+_collectors: list[QueryStats] = []
+
+# aggregated per route: {route: {"requests", "queries", "max_queries", "db_seconds"}}
+route_query_stats: dict[str, dict] = {}
+_route_stats_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    for collector in _collectors:
+        if collector is not stats:
+            collector.record(statement, elapsed)
+
+
+def instrument_engine(sync_engine: Engine) -> None:
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+for _engine in {engine, async_engine.sync_engine, replica_engine, async_replica_engine.sync_engine}:
+    instrument_engine(_engine)
+
+
+def _record_route(route: str, stats: QueryStats) -> None:
+    with _route_stats_lock:
+        entry = route_query_stats.setdefault(route, {"requests": 0, "queries": 0, "max_queries": 0,
+                                                     "db_seconds": 0.0})
+        entry["requests"] += 1
+        entry["queries"] += stats.count
+        entry["max_queries"] = max(entry["max_queries"], stats.count)
+        entry["db_seconds"] += stats.total_seconds
+
+
+# routes with the most statements per request, for the metrics endpoint.
+def get_route_query_stats(limit: int = 10) -> list[dict]:
+    with _route_stats_lock:
+        routes = [{"route": route, **entry, "avg_queries": entry["queries"] / entry["requests"]}
+                  for route, entry in route_query_stats.items()]
+    routes.sort(key=lambda entry: entry["avg_queries"], reverse=True)
+    return routes[:limit]
+
+
+# http middleware counting the statements (and database time) of every request.
+async def query_stats_middleware(request: Request, call_next):
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current_stats.reset(token)
+
+    route = request.scope.get("route")
+    route_path = f"{request.method} {route.path if route else request.url.path}"
+    _record_route(route_path, stats)
+
+    if stats.count > SQL_QUERY_LOG_THRESHOLD:
+        offenders = "\n".join(f"  {count}x {statement[:200]}" for statement, count in stats.top_offenders())
+        logger.warning(f"{route_path} issued {stats.count} statements ({stats.total_seconds * 1000:.1f} ms in the "
+                       f"database). Most repeated:\n{offenders}")
+
+    request.state.query_stats = stats
+    return response
+
+
+@contextmanager
+def max_queries(limit: int):
+    """
+    Fail (with an AssertionError) if the block issues more than `limit` statements, e.g. to catch N+1 regressions:
+
+        with max_queries(3):
+            client.get("/api/application/form/1")
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        _collectors.remove(stats)
+        _current_stats.reset(token)
+
+    if stats.count > limit:
+        offenders = "\n".join(f"  {count}x {statement[:200]}" for statement, count in stats.top_offenders())
+        raise AssertionError(f"Expected at most {limit} statements, got {stats.count}. Most repeated:\n{offenders}")
+
+
+_raise_on_lazy_load = SQL_RAISE_ON_LAZY_LOAD
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _add_raiseload(state: ORMExecuteState):
+    if _raise_on_lazy_load and state.is_select and not state.is_column_load and not state.is_relationship_load:
+        state.statement = state.statement.options(raiseload("*"))
+
+
+@contextmanager
+def raise_on_lazy_load(enabled: bool = True):
+    """
+    Make lazy loads of relationships (e.g. Club.members) raise inside the block, for objects loaded inside it.
+    """
+    global _raise_on_lazy_load
+    previous, _raise_on_lazy_load = _raise_on_lazy_load, enabled
+    try:
+        yield
+    finally:
+        _raise_on_lazy_load = previous
@@ -1,22 +1,58 @@
+import asyncio
+import hashlib
+import logging
 import secrets
+import time
 from datetime import datetime, timedelta
 from os import getenv
 
-from fastapi import HTTPException, Cookie, Depends
+from fastapi import HTTPException, Cookie
 from pytz import timezone, UTC
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from models.users.session_model import Session as SessionModel
+from models.users.session_model import Session as SessionModel, SessionRevocation
 from models.users.users_model import User
-from utils.crypto_utils import encrypt_data, decrypt_data
-from utils.database_utils import get_db
+from utils.cache_utils import TTLCache
+from utils.crypto_utils import encrypt_data, decrypt_data, sign_claims, verify_claims
+from utils.database_utils import AsyncSessionLocal, SessionLocal
 
 SESSION_COOKIE_NAME = "session_token"
+SESSION_CLAIMS_COOKIE_NAME = "session_claims"
 SESSION_EXPIRY_DAYS = int(getenv("SESSION_EXPIRY_DAYS", 5))
+# how often expired sessions are deleted, and how many rows each DELETE statement may remove.
+SESSION_REAP_INTERVAL_SECONDS = float(getenv("SESSION_REAP_INTERVAL_SECONDS", 15 * 60))
+SESSION_REAP_BATCH_SIZE = int(getenv("SESSION_REAP_BATCH_SIZE", 5000))
+# stateless mode: alongside the session cookie, issue a signed claims cookie that read-only endpoints can verify with
+# a single HMAC. logouts reach other workers through the revocation set, refreshed every few seconds.
+STATELESS_SESSIONS = getenv("STATELESS_SESSIONS", "False").lower() in ("true", "t", "1")
+SESSION_REVOCATION_REFRESH_SECONDS = float(getenv("SESSION_REVOCATION_REFRESH_SECONDS", 15))
+# validated sessions are cached in-process for a few seconds, keyed by the (decrypted) session ID.
+SESSION_CACHE_TTL_SECONDS = float(getenv("SESSION_CACHE_TTL_SECONDS", 30))
+SESSION_CACHE_SIZE = int(getenv("SESSION_CACHE_SIZE", 10000))
 
+session_cache = TTLCache(max_size=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL_SECONDS)
 
-# create a new session and return the encrypted session ID
-def create_session(user_uid: str, user_agent: str, ip_address: str, db: Session) -> str:
+logger = logging.getLogger(__name__)
+
+# the user columns a validated session resolves to (see get_current_user).
+SESSION_USER_COLUMNS = (User.uid, User.email, User.first_name, User.last_name, User.roll_number, User.hobbies,
+                        User.skills, User.batch, User.profile_picture)
+
+
+# handles of revoked (logged out, not yet expired) sessions.
+revoked_session_handles: set[str] = set()
+
+
+# a stable, non-secret identifier for a session, safe to put in signed claims.
+def session_handle(session_id: str) -> str:
+    return hashlib.sha256(session_id.encode()).hexdigest()[:32]
+
+
+# create a new session and return the encrypted session ID, along with the signed claims (None if not in stateless
+# mode).
+def create_session(user_uid: str, user_agent: str, ip_address: str, db: Session) -> tuple[str, str | None]:
     # unique random session ID
     session_id = secrets.token_urlsafe(32)
     encrypted_id = encrypt_data(session_id)
@@ -29,12 +65,32 @@ def create_session(user_uid: str, user_agent: str, ip_address: str, db: Session)
     db.add(session)
     db.commit()
 
-    return encrypted_id
+    claims = None
+    if STATELESS_SESSIONS:
+        claims = sign_claims(
+            {"uid": user_uid, "exp": int(expires_at.timestamp()), "sid": session_handle(session_id)})
+
+    return encrypted_id, claims
+
+
+# verify a signed claims cookie without touching the database. returns the claims if valid, None otherwise.
+def verify_session_claims(token: str | None) -> dict | None:
+    if not token:
+        return None
+
+    claims = verify_claims(token)
+    if claims is None or claims.get("exp", 0) < datetime.now(timezone("UTC")).timestamp():
+        return None
+    if claims.get("sid") in revoked_session_handles:
+        return None
+    return claims
 
 
 # common session validation logic.
-def validate_session(encrypted_session_id: str, db: Session):
+async def validate_session(encrypted_session_id: str, db: AsyncSession | None = None):
     """
+    :param db: async session to query with. if omitted, a short lived one is opened only when the cache misses, so the
+        connection goes back to the pool as soon as the session is validated.
     :return: (user_dict, session_id (decrypted)) if valid, (None, None) if invalid.
     """
     # missing cookie case
@@ -45,37 +101,47 @@ def validate_session(encrypted_session_id: str, db: Session):
     if session_id is None:
         return None, None
 
-    session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
-
-    # check if session exists and is not expired
+    # check the cache before touching the database
     now = datetime.now(timezone("UTC"))
-    if session is None or session.expires_at.replace(tzinfo=UTC) < now:
-        if session:  # if session exists but is expired, delete it
-            db.delete(session)
-            db.commit()
-        return None, None
-
-    # query the user
-    user = db.query(User).filter(User.uid == session.user_uid).first()
+    cached = session_cache.get(session_id)
+    if cached is not None:
+        user_data, expires_at = cached
+        if expires_at >= now:
+            return dict(user_data), session_id
+        session_cache.pop(session_id)
 
-    if user is None:
-        # delete invalid session
-        db.delete(session)
-        db.commit()
+    # one indexed lookup over sessions + users. expired sessions are filtered out here and left to be
+    # cleaned up in the background, so validation never writes.
+    query = (select(SessionModel.expires_at, *SESSION_USER_COLUMNS)
+             .join(User, User.uid == SessionModel.user_uid)
+             .where(SessionModel.id == session_id, SessionModel.expires_at >= now.replace(tzinfo=None)))
+    if db is None:
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(query)).first()
+    else:
+        row = (await db.execute(query)).first()
+    if row is None:
         return None, None
 
     # return user data and original encrypted session ID
-    user_data = {"uid": user.uid, "email": user.email, "first_name": user.first_name, "last_name": user.last_name,
-        "roll_number": user.roll_number, "hobbies": user.hobbies, "skills": user.skills, "batch": user.batch,
-        "profile_picture": user.profile_picture}
+    user_data = {column.key: getattr(row, column.key) for column in SESSION_USER_COLUMNS}
+
+    # never cache a session past its own expiry
+    expires_at = row.expires_at.replace(tzinfo=UTC)
+    ttl = min(SESSION_CACHE_TTL_SECONDS, (expires_at - now).total_seconds())
+    session_cache.set(session_id, (user_data, expires_at), ttl=ttl)
+
+    return dict(user_data), session_id
 
-    return user_data, session_id
+
+# drop every cached session belonging to this user (e.g. after their profile changes).
+def evict_cached_user_sessions(user_uid: str) -> int:
+    return session_cache.evict_where(lambda entry: entry[0]["uid"] == user_uid)
 
 
 # get current user's details
-async def get_current_user(encrypted_session_id: str = Cookie(None, alias=SESSION_COOKIE_NAME),
-        db: Session = Depends(get_db), ):
-    user_data, _ = validate_session(encrypted_session_id, db)
+async def get_current_user(encrypted_session_id: str = Cookie(None, alias=SESSION_COOKIE_NAME)):
+    user_data, _ = await validate_session(encrypted_session_id)
 
     if user_data is None:
         raise HTTPException(status_code=401, detail="Not Authenticated")
@@ -83,10 +149,29 @@ async def get_current_user(encrypted_session_id: str = Cookie(None, alias=SESSIO
     return user_data
 
 
-# check if the current user is logged in. If yes, return the decrypted session id.
+# the current user for read-only endpoints that only need their uid. in stateless mode a valid signed claims cookie is
+# enough and only {"uid": ...} is returned, without touching the database; otherwise this is get_current_user.
+# endpoints that change data, or need the rest of the profile, must use get_current_user.
+async def get_read_only_user(encrypted_session_id: str = Cookie(None, alias=SESSION_COOKIE_NAME),
+        session_claims: str = Cookie(None, alias=SESSION_CLAIMS_COOKIE_NAME), ):
+    if STATELESS_SESSIONS:
+        claims = verify_session_claims(session_claims)
+        if claims is not None:
+            return {"uid": claims["uid"]}
+
+    return await get_current_user(encrypted_session_id)
+
+
+# check if the current user is logged in. If yes, return the decrypted session id (or the session handle, if the
+# signed claims were enough to tell).
 async def check_current_user(encrypted_session_id: str = Cookie(None, alias=SESSION_COOKIE_NAME),
-        db: Session = Depends(get_db), ):
-    _, session_id = validate_session(encrypted_session_id, db)
+        session_claims: str = Cookie(None, alias=SESSION_CLAIMS_COOKIE_NAME), ):
+    if STATELESS_SESSIONS:
+        claims = verify_session_claims(session_claims)
+        if claims is not None:
+            return claims["sid"]
+
+    _, session_id = await validate_session(encrypted_session_id)
     return session_id
 
 
@@ -99,9 +184,165 @@ def invalidate_session(encrypted_session_id: str, db: Session) -> bool:
     if session_id is None:
         return False
 
+    session_cache.pop(session_id)
     session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
     if session:
+        # signed claims for this session stay valid until they expire, so remember that it was revoked
+        handle = session_handle(session_id)
+        db.merge(SessionRevocation(handle=handle, expires_at=session.expires_at))
         db.delete(session)
         db.commit()
+        revoked_session_handles.add(handle)
         return True
     return False
+
+
+# reload the revocation set from the database.
+def refresh_revoked_session_handles(db: Session) -> int:
+    global revoked_session_handles
+    now = datetime.now(timezone("UTC")).replace(tzinfo=None)
+    handles = db.execute(select(SessionRevocation.handle).where(SessionRevocation.expires_at >= now)).scalars().all()
+
+    # swap the whole set, so readers never see it half filled
+    revoked_session_handles = set(handles)
+    return len(handles)
+
+
+# stats about the expired session reaper, exposed for monitoring.
+reaper_stats = {"runs": 0, "last_removed": 0, "last_duration_seconds": 0.0, "total_removed": 0, "last_run_at": None}
+
+
+# delete expired sessions in batches of batch_size rows (one short transaction each). returns the number deleted.
+def reap_expired_sessions(db: Session, batch_size: int = SESSION_REAP_BATCH_SIZE) -> int:
+    now = datetime.now(timezone("UTC")).replace(tzinfo=None)
+    removed = 0
+    while True:
+        expired_ids = select(SessionModel.id).where(SessionModel.expires_at < now).limit(batch_size)
+        result = db.execute(delete(SessionModel).where(SessionModel.id.in_(expired_ids)))
+        db.commit()
+
+        removed += result.rowcount
+        if result.rowcount < batch_size:
+            return removed
+
+
+def _run_reaper_pass() -> int:
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        removed = reap_expired_sessions(db)
+
+        # revocations are only needed until the revoked session would have expired anyway
+        now = datetime.now(timezone("UTC")).replace(tzinfo=None)
+        db.execute(delete(SessionRevocation).where(SessionRevocation.expires_at < now))
+        db.commit()
+    finally:
+        db.close()
+    duration = time.perf_counter() - start
+
+    reaper_stats["runs"] += 1
+    reaper_stats["last_removed"] = removed
+    reaper_stats["last_duration_seconds"] = duration
+    reaper_stats["total_removed"] += removed
+    reaper_stats["last_run_at"] = datetime.now(timezone("UTC")).isoformat()
+    logger.info(f"Session reaper removed {removed} expired sessions in {duration:.3f}s")
+    return removed
+
+
+# periodic background task (started on server startup) that cleans up expired sessions.
+async def run_session_reaper(interval: float = SESSION_REAP_INTERVAL_SECONDS):
+    while True:
+        try:
+            await asyncio.to_thread(_run_reaper_pass)
+        except Exception as e:
+            logger.error(f"Session reaper pass failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def _run_revocation_refresh() -> int:
+    db = SessionLocal()
+    try:
+        return refresh_revoked_session_handles(db)
+    finally:
+        db.close()
+
+
+# periodic background task (started on server startup in stateless mode) that keeps the revocation set fresh.
+async def run_revocation_refresher(interval: float = SESSION_REVOCATION_REFRESH_SECONDS):
+    while True:
+        try:
+            await asyncio.to_thread(_run_revocation_refresh)
+        except Exception as e:
+            logger.error(f"Session revocation refresh failed: {e}")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    # latency benchmark of GET /api/user/user_info: the old two-query session lookup against the joined query, with
+    # and without the session cache. seeds a user with many sessions and removes them afterwards.
+    # usage (from backend/): python -m utils.session_utils [requests] [sessions]
+    import statistics
+    import sys
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+
+    from routers import users_router
+
+    request_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    session_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    benchmark_uid = "session-benchmark"
+
+    # what validate_session did before: the session, then its user, on a blocking connection
+    async def two_query_current_user(encrypted_session_id: str = Cookie(None, alias=SESSION_COOKIE_NAME)):
+        db = SessionLocal()
+        try:
+            session = db.query(SessionModel).filter(SessionModel.id == decrypt_data(encrypted_session_id)).first()
+            if session is None or session.expires_at.replace(tzinfo=UTC) < datetime.now(timezone("UTC")):
+                raise HTTPException(status_code=401, detail="Not Authenticated")
+            user = db.query(User).filter(User.uid == session.user_uid).first()
+            return {column.key: getattr(user, column.key) for column in SESSION_USER_COLUMNS}
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(users_router.router, prefix="/api/user")
+    client = TestClient(app)
+
+    db = SessionLocal()
+    db.add(User(uid=benchmark_uid, email=f"{benchmark_uid}@example.com", first_name="Session",
+                last_name="Benchmark", roll_number=benchmark_uid))
+    db.commit()
+    expires_at = datetime.now(timezone("UTC")).replace(tzinfo=None) + timedelta(days=1)
+    db.execute(insert(SessionModel), [{"id": secrets.token_urlsafe(32), "user_uid": benchmark_uid,
+                                       "expires_at": expires_at} for _ in range(session_count)])
+    db.commit()
+    encrypted_id, _ = create_session(benchmark_uid, "benchmark", "127.0.0.1", db)
+    client.cookies.set(SESSION_COOKIE_NAME, encrypted_id)
+
+    def run(name: str, clear_cache: bool) -> None:
+        latencies = []
+        for _ in range(request_count):
+            if clear_cache:
+                session_cache.clear()
+            start = time.perf_counter()
+            response = client.get("/api/user/user_info")
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(f"{name}: p50 {quantiles[49]:.2f} ms, p99 {quantiles[98]:.2f} ms over {request_count} requests")
+
+    try:
+        # warm up the pools and the keyring
+        client.get("/api/user/user_info")
+        app.dependency_overrides[get_current_user] = two_query_current_user
+        run("two queries", clear_cache=True)
+        app.dependency_overrides.clear()
+        run("joined query", clear_cache=True)
+        run("joined query + cache", clear_cache=False)
+    finally:
+        db.execute(delete(SessionModel).where(SessionModel.user_uid == benchmark_uid))
+        db.execute(delete(User).where(User.uid == benchmark_uid))
+        db.commit()
+        db.close()
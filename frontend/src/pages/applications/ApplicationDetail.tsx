@@ -118,7 +118,7 @@ const ApplicationDetail: React.FC = () => {
                 }
             }
 
-            message.success(`Application ${newStatus} successfully!`);
+            message.success(`Application ${newStatus} successfully! The applicant will be emailed about it in a few minutes.`);
             await fetchApplicationDetail();
         } catch (err) {
             console.error('Error updating application status:', err);
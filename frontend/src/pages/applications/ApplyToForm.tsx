@@ -28,6 +28,8 @@ const ApplyToForm: React.FC = () => {
   const [success, setSuccess] = useState<string | null>(null);
   const [_userInfo, setUserInfo] = useState<any>(null);
   const [isDeadlinePassed, setIsDeadlinePassed] = useState<boolean>(false);
+  // sent with every submit attempt, so retries of the same submission are safe
+  const [idempotencyKey] = useState<string>(() => crypto.randomUUID());
 
   useEffect(() => {
     // Fetch form details and enforce RBAC when component mounts
@@ -139,7 +141,10 @@ const ApplyToForm: React.FC = () => {
       const payload = { form_id: formId, responses };
       const response = await fetch("/api/application/submit-application", {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: {
+          "Content-Type": "application/json",
+          "Idempotency-Key": idempotencyKey,
+        },
         body: JSON.stringify(payload),
         credentials: "include",
       });